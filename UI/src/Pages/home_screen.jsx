@@ -16,6 +16,14 @@ function Home() {
   const [isUploading, setIsUploading] = React.useState(false);
   const [uploadProgress, setUploadProgress] = React.useState(0);
   const fileInputRef = React.useRef(null);
+
+  // history paging: "since" cursor for reconnects, "before" cursor for older pages,
+  // and how many leading messages of `conversation` are known to be in the server log
+  const cursorRef = React.useRef(null);
+  const olderCursorRef = React.useRef(null);
+  const syncedCountRef = React.useRef(0);
+  const [hasOlder, setHasOlder] = React.useState(false);
+  const [loadingOlder, setLoadingOlder] = React.useState(false);
  
   const getUserIdFromToken = () => {
     const token = localStorage.getItem('authToken');
@@ -49,8 +57,8 @@ function Home() {
       console.log('Connected to server');
       setIsConnected(true);
       
-     
-      newSocket.emit('/chat/v1/ai/stream-chat', { user_id });
+      // after a reconnect only the messages added since the last cursor are sent
+      newSocket.emit('/chat/v1/ai/stream-chat', { user_id, since: cursorRef.current });
     });
 
     newSocket.on('connected', (data) => {
@@ -60,6 +68,7 @@ function Home() {
     newSocket.on('new_message', (conversationData) => {
       console.log('Received conversation:', conversationData);
       if (Array.isArray(conversationData)) {
+        syncedCountRef.current = conversationData.length;
         setConversation(conversationData);
         console.log('Conversation set:', conversationData);
         setShowMessages(true);
@@ -67,6 +76,38 @@ function Home() {
       }
     });
 
+    newSocket.on('history_cursor', (page) => {
+      cursorRef.current = page.cursor;
+      olderCursorRef.current = page.before;
+      setHasOlder(Boolean(page.before));
+      setLoadingOlder(false);
+    });
+
+    newSocket.on('history_delta', (page) => {
+      // replaces the unsynced local tail (messages shown while sending) with the logged ones
+      const synced = syncedCountRef.current;
+      syncedCountRef.current = synced + page.messages.length;
+      cursorRef.current = page.cursor;
+      setConversation(prev => [...prev.slice(0, synced), ...page.messages]);
+      if (page.has_more) {
+        newSocket.emit('/chat/v1/ai/stream-chat', { user_id, since: page.cursor });
+      }
+    });
+
+    newSocket.on('history_page', (page) => {
+      setLoadingOlder(false);
+      if (page.reset) {
+        // the log changed since the cursor was issued; reload the newest page
+        cursorRef.current = null;
+        newSocket.emit('/chat/v1/ai/stream-chat', { user_id });
+        return;
+      }
+      syncedCountRef.current += page.messages.length;
+      olderCursorRef.current = page.before;
+      setHasOlder(Boolean(page.before));
+      setConversation(prev => [...page.messages, ...prev]);
+    });
+
     newSocket.on('ai_response', (data) => {
       console.log('AI response received:', data);
       if (data.response) {
@@ -141,6 +182,7 @@ function Home() {
     newSocket.on('error', (error) => {
       console.error('Socket error:', error);
       setIsLoading(false); 
+      setLoadingOlder(false);
       
       setConversation(prev => [
         ...prev,
@@ -168,6 +210,13 @@ function Home() {
     };
   }, []);
 
+  const loadOlderMessages = () => {
+    const user_id = getUserIdFromToken();
+    if (!socket || !isConnected || !user_id || !olderCursorRef.current || loadingOlder) return;
+    setLoadingOlder(true);
+    socket.emit('/chat/v1/ai/history', { user_id, before: olderCursorRef.current });
+  };
+
    
   const handleFileSelect = (e) => {
     const file = e.target.files[0];
@@ -330,7 +379,7 @@ function Home() {
   const testSocket = () => {
     if (socket && isConnected) {
       const user_id = getUserIdFromToken();
-      socket.emit('/chat/v1/ai/stream-chat', { user_id });
+      socket.emit('/chat/v1/ai/stream-chat', { user_id, since: cursorRef.current });
     }
   };
 
@@ -375,7 +424,12 @@ function Home() {
    
             <div className="chat-area">
               {showMessages || conversation.length > 0 ? (
-                <Messages conversation={conversation} />
+                <Messages
+                  conversation={conversation}
+                  hasOlder={hasOlder}
+                  loadingOlder={loadingOlder}
+                  onLoadOlder={loadOlderMessages}
+                />
               ) : (
                 <div className="empty-chat">
                   <p className="empty-text">Start a conversation with HealthcareAi</p>
@@ -2,18 +2,39 @@ import React, { useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 import './styles/messages.css';
 
-function Messages({ conversation }) {
+function Messages({ conversation, hasOlder = false, loadingOlder = false, onLoadOlder }) {
   const messagesEndRef = React.useRef(null);
+  const listRef = React.useRef(null);
+  const lastMessageRef = React.useRef(null);
+  const scrollHeightRef = React.useRef(0);
   const [copiedMessageId, setCopiedMessageId] = useState(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
-  React.useEffect(() => {
-    scrollToBottom();
+  React.useLayoutEffect(() => {
+    const list = listRef.current;
+    const lastMessage = conversation[conversation.length - 1];
+    if (list && lastMessage && lastMessage === lastMessageRef.current) {
+      // older messages were prepended: keep the same messages in view
+      list.scrollTop += list.scrollHeight - scrollHeightRef.current;
+    } else {
+      scrollToBottom();
+    }
+    lastMessageRef.current = lastMessage;
+    if (list) scrollHeightRef.current = list.scrollHeight;
   }, [conversation]);
 
+  const handleScroll = () => {
+    const list = listRef.current;
+    if (!list) return;
+    scrollHeightRef.current = list.scrollHeight;
+    if (list.scrollTop < 80 && hasOlder && !loadingOlder && onLoadOlder) {
+      onLoadOlder();
+    }
+  };
+
   const formatTime = (timeString) => {
     if (!timeString) return '';
     const date = new Date(timeString);
@@ -309,7 +330,8 @@ function Messages({ conversation }) {
 
   return (
     <div className="messages-container">
-      <div className="messages-list">
+      <div className="messages-list" ref={listRef} onScroll={handleScroll}>
+        {loadingOlder && <div className="messages-loading-older">Loading earlier messages...</div>}
         {conversation.map((message, index) => (
           <div
             key={index}
@@ -1,64 +1,64 @@
 import pathlib
 import sys
-import ast
 import asyncio
+import time
+from typing import Callable, Optional
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
 
-from model.llm import llm
-from router.model_router import CHAINS, ROUTING_TEMPLATE
-from tools.create_report_doc_tool import create_report_tool, CreateReportToolShema
-from tools.read_document_tool import read_document
-from memory.conversation import load_conversation, write_conversations
-from langchain.agents import initialize_agent, AgentType
-from langchain_core.tools import StructuredTool
-from templates.agent_prompt import agent_prompt
-from database.database_manager import load_user_profile, load_user_uploaded_doc
-from data.data_manager import load_reference_data
-from tools.medical_image_generator import generate_image, IMAGEGENERATORSCHEMA
+import router.model_router as model_router
+# the schema classes must be the ones the chains were built with
+from router.model_router import CHAINS, MedicalReportOutput, MedicalImagePrompt
+from router.pre_router import PRE_ROUTER
+from tools.create_report_doc_tool import create_report_tool
+from memory.conversation import write_conversation_turn
+from ai.context_loader import load_turn_context
+from ai.answer_cache import ANSWER_CACHE, shareable_profile, format_shareable_profile
+from configuration.config import Config
+from tools.medical_image_generator import generate_image
 
 
 # -------------------------------
-# TOOL DEFINITIONS
+# TOOL DISPATCH
 # -------------------------------
 
-write_report_tool = StructuredTool(
-    name="write_report",
-    description="Generate a professional medical report PDF",
-    coroutine=create_report_tool,
-    args_schema=CreateReportToolShema,
-    return_direct=True,
-    handle_tool_error=True,
-    handle_validation_error=True,
-)
-
-async def generate_image_async(image_prompt: str):
-    return await asyncio.to_thread(generate_image, image_prompt)
-
-generate_image_tool = StructuredTool(
-    name="generate_medical_image",
-    description="Generate a medical image using Freepik AI",
-    coroutine=generate_image_async,
-    args_schema=IMAGEGENERATORSCHEMA,
-    return_direct=True,
-    handle_tool_error=True,
-    handle_validation_error=True,
-)
-
-TOOLS = [write_report_tool, generate_image_tool]
+# The WriteDocument / GenerateMedicalImage chains return typed objects via
+# structured output; each type maps straight to the tool that consumes it.
+TOOL_DISPATCH = {
+    MedicalReportOutput: lambda output: create_report_tool(filename=output.filename, body=output.body),
+    MedicalImagePrompt: lambda output: generate_image(output.image_prompt),
+}
 
 
 # -------------------------------
 # HELPERS
 # -------------------------------
 
-def is_dict_string(s: str) -> bool:
-    if not isinstance(s, str):
-        return False
-    try:
-        return isinstance(ast.literal_eval(s), dict)
-    except Exception:
-        return False
+# Routes whose chain ends in the chat model (no output parser), so tokens
+# can be forwarded to the client as they are generated.
+STREAMABLE_ROUTES = {"GeneralHealth"}
+
+
+def chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return content if isinstance(content, str) else str(content)
+
+
+async def stream_route(route, inputs: dict, on_token: Callable[[str], None]) -> str:
+    """Run ``route`` with ``astream``, forwarding each token and returning the full text."""
+    parts = []
+    async for chunk in route.astream(inputs):
+        text = chunk_text(chunk)
+        if text:
+            parts.append(text)
+            on_token(text)
+    return "".join(parts)
 
 
 # -------------------------------
@@ -68,31 +68,58 @@ def is_dict_string(s: str) -> bool:
 async def get_ai_response(
     user_id: str,
     user_input: str,
-    user_uploaded_file: str | None = None
+    user_uploaded_file: str | None = None,
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> tuple[bool, str]:
+    """
+    Route and answer one chat turn, persisting it to the conversation log.
+
+    When ``on_token`` is given and the selected route is streamable, the
+    answer is generated with ``astream`` and every token is passed to
+    ``on_token`` as it arrives; the finished message is still persisted once
+    and returned as usual.
+
+    Answers to self-contained GeneralHealth questions are served from
+    ANSWER_CACHE when possible, which skips routing and generation.
+    """
 
     try:
+        context = await load_turn_context(user_id, user_input, user_uploaded_file)
+
         # -------------------------------
-        # AGENT INIT
+        # ANSWER CACHE
         # -------------------------------
-        Agent = initialize_agent(
-            llm=llm(),
-            tools=TOOLS,
-            agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
-            verbose=True,
-            agent_kwargs={"prefix": agent_prompt},
-        )
+        cache_key = None
+        shared_profile = None
+        if Config.ANSWER_CACHE_ENABLED:
+            if ANSWER_CACHE.is_cacheable(user_input, context.history_entries, context.uploaded_text):
+                shared_profile = await asyncio.to_thread(shareable_profile, user_id)
+                cache_key = ANSWER_CACHE.key(user_input, context.reference_version, shared_profile)
+                cached = await asyncio.to_thread(ANSWER_CACHE.get, cache_key)
+                if cached is not None:
+                    if on_token is not None:
+                        on_token(cached)
+                    await asyncio.to_thread(write_conversation_turn, user_id, user_input, cached, uploaded_file=user_uploaded_file)
+                    return True, cached
+            else:
+                ANSWER_CACHE.record_bypass()
 
         # -------------------------------
         # ROUTING
         # -------------------------------
-        route_response = await ROUTING_TEMPLATE.ainvoke({
-            "user_input": user_input,
-            "conversation_history": load_conversation(user_id),
-            "reference_data": load_reference_data(),
-        })
+        # the pre-router reads its log and may start a retrain; keep that off the event loop
+        route_key = await asyncio.to_thread(PRE_ROUTER.route, user_input) if Config.PRE_ROUTER_ENABLED else None
+
+        if route_key is None:
+            route_response = await model_router.ROUTING_TEMPLATE.ainvoke({
+                "user_input": user_input,
+                "conversation_history": context.conversation_history,
+                "reference_data": context.reference_data,
+            })
+
+            route_key = getattr(route_response, "content", "").strip()
+            await asyncio.to_thread(PRE_ROUTER.record, user_input, route_key)
 
-        route_key = getattr(route_response, "content", "").strip()
         route = CHAINS.get(route_key)
 
         if route is None:
@@ -100,52 +127,57 @@ async def get_ai_response(
                 "I couldn't determine the correct assistant module for your request. "
                 "Please clarify what you want to do."
             )
-            write_conversations(user_id, "user", user_input, uploaded_file=user_uploaded_file)
-            write_conversations(user_id, "ai", fallback)
+            await asyncio.to_thread(write_conversation_turn, user_id, user_input, fallback, uploaded_file=user_uploaded_file)
             return True, fallback
 
         # -------------------------------
         # ROUTE EXECUTION
         # -------------------------------
-        router_output = await route.ainvoke({
-            "user_input": user_input,
-            "conversation_history": load_conversation(user_id),
-            "user_profile": load_user_profile(user_id),
-            "reference_data": load_reference_data(),
-            "user_uploaded_files_or_text": read_document(
-                filepath=load_user_uploaded_doc(
-                    user_id=user_id,
-                    user_uploaded_file=user_uploaded_file,
-                )
-            ),
-        })
-
-        output_text = getattr(router_output, "content", str(router_output))
+        route_inputs = context.route_inputs(user_input)
+        cache_answer = cache_key is not None and route_key == "GeneralHealth"
+        if cache_answer:
+            # cached answers are shared, so generate them without personal details or history
+            route_inputs["user_profile"] = format_shareable_profile(shared_profile)
+            route_inputs["conversation_history"] = ""
+        started = time.perf_counter()
+
+        if on_token is not None and route_key in STREAMABLE_ROUTES:
+            output_text = await stream_route(route, route_inputs, on_token)
+            if cache_answer and output_text:
+                await asyncio.to_thread(ANSWER_CACHE.put, cache_key, output_text, time.perf_counter() - started)
+            await asyncio.to_thread(write_conversation_turn, user_id, user_input, output_text, uploaded_file=user_uploaded_file)
+            return True, output_text
+
+        router_output = await route.ainvoke(route_inputs)
+        if router_output is None:
+            # structured output is None when the model made no tool call; retry once
+            router_output = await route.ainvoke(route_inputs)
+        if router_output is None:
+            # still nothing to hand to the tool: answer it as a health question instead
+            if on_token is not None:
+                output_text = await stream_route(CHAINS["GeneralHealth"], route_inputs, on_token)
+                await asyncio.to_thread(write_conversation_turn, user_id, user_input, output_text, uploaded_file=user_uploaded_file)
+                return True, output_text
+            router_output = await CHAINS["GeneralHealth"].ainvoke(route_inputs)
 
         # -------------------------------
-        # TOOL DECISION
+        # TOOL DISPATCH
         # -------------------------------
-        has_report_keys = all(k in output_text for k in ("title", "filename"))
-        has_image_key = "image_prompt" in output_text
+        tool = TOOL_DISPATCH.get(type(router_output))
 
-        if has_report_keys or has_image_key:
-            agent_response = await Agent.ainvoke({"input": output_text})
-
-            final_output = (
-                agent_response.get("output")
-                if isinstance(agent_response, dict)
-                else str(agent_response)
-            )
-
-            write_conversations(user_id, "user", user_input, uploaded_file=user_uploaded_file)
-            write_conversations(user_id, "ai", final_output)
+        if tool is not None:
+            final_output = await tool(router_output)
+            await asyncio.to_thread(write_conversation_turn, user_id, user_input, final_output, uploaded_file=user_uploaded_file)
             return True, final_output
 
+        output_text = getattr(router_output, "content", str(router_output))
+
         # -------------------------------
         # NO TOOL NEEDED
         # -------------------------------
-        write_conversations(user_id, "user", user_input, uploaded_file=user_uploaded_file)
-        write_conversations(user_id, "ai", output_text)
+        if cache_answer and output_text:
+            await asyncio.to_thread(ANSWER_CACHE.put, cache_key, output_text, time.perf_counter() - started)
+        await asyncio.to_thread(write_conversation_turn, user_id, user_input, output_text, uploaded_file=user_uploaded_file)
         return True, output_text
 
     except ConnectionError:
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from database.user_repository import get_user_repository
+from router.pre_router import FOLLOW_UP_PATTERN
+from templates.general_health_template import COMPREHENSIVE_HEALTHCARE_AI_SYSTEM_PROMPT
+
+
+TEMPLATE_VERSION = hashlib.sha1(COMPREHENSIVE_HEALTHCARE_AI_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+# Profile fields an answer may depend on. Only these are shown to the model
+# on cacheable turns, so cached answers carry nothing user-specific.
+PROFILE_FIELDS = ("gender", "location")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", (text or "").lower())).strip()
+
+
+def shareable_profile(user_id: str) -> dict:
+    user = get_user_repository().get_by_id(user_id) or {}
+    return {field: str(user.get(field, "(unknown)")).strip().lower() for field in PROFILE_FIELDS}
+
+
+def format_shareable_profile(profile: dict) -> str:
+    return "".join(f"{field}: {value}\n" for field, value in profile.items())
+
+
+class AnswerCache:
+    """
+    TTL + LRU cache of GeneralHealth answers.
+
+    The key is the normalized question, the reference-data version, a hash
+    of the shareable profile fields and the prompt template version, so a
+    knowledge or prompt change invalidates it implicitly. Entries live in
+    an in-memory LRU of ``max_entries``. With ``disk_dir`` set they are also
+    written as JSON files that survive restarts and are shared between
+    workers. Expired entries are dropped when they are read.
+
+    Turns with an uploaded document or more than ``max_history`` logged
+    messages (none by default) are not cacheable. Neither are bare
+    follow-ups ("yes", "do it") that come after history. Cacheable answers
+    are generated without the conversation history, so nothing from a
+    patient's earlier turns can end up in a shared entry.
+    """
+
+    def __init__(self, ttl_seconds: float = 24 * 3600, max_entries: int = 1024,
+                 disk_dir: Optional[pathlib.Path] = None, max_history: int = 0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.disk_dir = pathlib.Path(disk_dir) if disk_dir else None
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "saved_seconds": 0.0}
+
+    # -------------------------------
+    # KEYS / ELIGIBILITY
+    # -------------------------------
+
+    def is_cacheable(self, user_input: str, history_entries: list[dict], uploaded_text: str) -> bool:
+        if uploaded_text or len(history_entries) > self.max_history:
+            return False
+        if history_entries and FOLLOW_UP_PATTERN.search(user_input or ""):
+            return False
+        return bool(normalize_question(user_input))
+
+    def key(self, user_input: str, reference_version: str, profile: dict) -> str:
+        material = json.dumps({
+            "question": normalize_question(user_input),
+            "reference_version": reference_version,
+            "profile": hashlib.sha1(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest(),
+            "template_version": TEMPLATE_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    # -------------------------------
+    # STORAGE
+    # -------------------------------
+
+    def _disk_path(self, key: str) -> pathlib.Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry["expires_at"] <= now:
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += entry["seconds"]
+                return entry["answer"]
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                entry = None
+            if entry is not None and entry.get("expires_at", 0) <= now:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    self._stats["saved_seconds"] += entry["seconds"]
+                return entry["answer"]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, answer: str, seconds: float) -> None:
+        """Store ``answer``; ``seconds`` is what generating it cost (reported as saved on hits)."""
+        entry = {"answer": answer, "seconds": seconds, "expires_at": time.time() + self.ttl_seconds}
+        self._remember(key, entry)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+ANSWER_CACHE = AnswerCache(
+    ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+    disk_dir=Config.ANSWER_CACHE_DIR,
+    max_history=Config.ANSWER_CACHE_MAX_HISTORY,
+)
@@ -0,0 +1,135 @@
+import asyncio
+import pathlib
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+
+from memory.conversation import read_conversation_entries
+from memory.history_window import HISTORY_WINDOW
+from database.database_manager import load_user_profile, load_user_uploaded_doc
+from data.data_manager import get_reference_data
+from data.document_index import DOCUMENT_INDEX, last_uploaded_file
+from configuration.config import Config
+
+
+class TurnContext:
+    """Everything the router and route chains need for one chat turn."""
+
+    def __init__(self):
+        self.history_entries: list[dict] = []
+        self.conversation_history = ""
+        self.user_profile = ""
+        self.reference_data = ""
+        self.reference_version = ""
+        self.uploaded_text = ""
+        self.timings: dict[str, float] = {}
+
+    def route_inputs(self, user_input: str) -> dict:
+        return {
+            "user_input": user_input,
+            "conversation_history": self.conversation_history,
+            "user_profile": self.user_profile,
+            "reference_data": self.reference_data,
+            "user_uploaded_files_or_text": self.uploaded_text,
+        }
+
+
+class StageTimings:
+    """Running per-stage totals of context loading time, in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = defaultdict(int)
+        self._total = defaultdict(float)
+
+    def add(self, timings: dict[str, float]) -> None:
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._count[stage] += 1
+                self._total[stage] += seconds
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "count": self._count[stage],
+                    "avg_ms": 1000 * self._total[stage] / self._count[stage],
+                }
+                for stage in self._count
+            }
+
+
+CONTEXT_TIMINGS = StageTimings()
+
+
+def retrieval_query(history_entries: list[dict], user_input: str, recent: int = 4) -> str:
+    """User input plus the last few messages, used to pick reference entries."""
+    history = history_entries[-recent:]
+    return "\n".join([*(str(item.get("content", "")) for item in history), user_input])
+
+
+async def _timed(timings: dict, stage: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def _read_uploaded_document(user_id: str, user_uploaded_file: Optional[str], user_input: str) -> str:
+    if not user_uploaded_file:
+        return ""
+    return DOCUMENT_INDEX.relevant_passages(
+        user_id,
+        load_user_uploaded_doc(user_id=user_id, user_uploaded_file=user_uploaded_file),
+        query=user_input,
+    )
+
+
+async def load_turn_context(user_id: str, user_input: str, user_uploaded_file: Optional[str] = None) -> TurnContext:
+    """
+    Assemble the per-turn context with every blocking load run concurrently
+    in worker threads, so the event loop stays free. History is read once and
+    shared by the router and the route chain; reference retrieval starts as
+    soon as the history is available.
+
+    Only the chunks of the uploaded document that match ``user_input`` are
+    included. Without a new upload, the last document attached in the
+    conversation is reused for follow-ups (see ``last_uploaded_file``).
+    """
+    context = TurnContext()
+    timings = context.timings
+    start = time.perf_counter()
+    history = asyncio.ensure_future(_timed(timings, "history", read_conversation_entries, user_id))
+
+    async def history_and_reference():
+        context.history_entries = await history
+        context.conversation_history = await _timed(
+            timings, "history_window", HISTORY_WINDOW.build, user_id, context.history_entries
+        )
+        context.reference_data, context.reference_version = await _timed(
+            timings, "reference_data", get_reference_data,
+            query=retrieval_query(context.history_entries, user_input),
+        )
+
+    async def profile():
+        context.user_profile = await _timed(timings, "user_profile", load_user_profile, user_id)
+
+    async def uploaded_document():
+        document = user_uploaded_file or last_uploaded_file(
+            await history, user_input, within_turns=Config.DOCUMENT_FOLLOW_UP_TURNS
+        )
+        context.uploaded_text = await _timed(
+            timings, "uploaded_document", _read_uploaded_document, user_id, document, user_input
+        )
+
+    await asyncio.gather(history_and_reference(), profile(), uploaded_document())
+
+    timings["total"] = time.perf_counter() - start
+    CONTEXT_TIMINGS.add(timings)
+    return context
@@ -1,24 +1,54 @@
 from datetime import timedelta
 import string,random
-from flask import Flask , request , jsonify , send_from_directory , abort
+from flask import Flask , request , jsonify , abort
 from flask_socketio import SocketIO, emit, join_room
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
 import jwt
-from threading import Lock
-import asyncio,time,pathlib,sys 
+from threading import Lock, Thread
+import asyncio,time,pathlib,sys,os,signal
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from methods import *
+from event_loop import run_coroutine
 from configuration.config import Config
-from notifications.notification_manager import check_user_reminders,update_user_schedule,add_user_schedule,get_user_schedule
+from notifications.notification_manager import update_user_schedule,add_user_schedule,get_user_schedule
+from notifications.reminder_scheduler import REMINDER_SCHEDULER, schedule_title
+from notifications.delivery_ledger import DELIVERY_LEDGER
+from notifications.shared_reminder_state import SharedReminderState
+from database.blob_store import BLOB_STORE
+from database.user_repository import get_user_repository, is_valid_user_id
+from static_assets import send_asset
+from leader import LeaderLock
 from ai.ai import get_ai_response
+from model.llm import reload_llm
+from router.pre_router import PRE_ROUTER
+from ai.context_loader import CONTEXT_TIMINGS
+from ai.answer_cache import ANSWER_CACHE
 
 
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app=app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+
+def socketio_queue_options() -> dict:
+    """Message queue settings so several workers can deliver to each other's clients"""
+    url = Config.SOCKETIO_MESSAGE_QUEUE
+    if not url:
+        return {}
+    if url.startswith("local://"):
+        from local_queue import LocalSocketManager
+        return {"client_manager": LocalSocketManager(url)}
+    return {"message_queue": url}
+
+
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_queue_options())
+
+SCALED_OUT = bool(Config.SOCKETIO_MESSAGE_QUEUE)
+REMINDER_LEADER = LeaderLock(Config.SHARED_STATE_DIR / "reminder_leader.lock")
+if SCALED_OUT:
+    REMINDER_SCHEDULER.use_shared_state(SharedReminderState(Config.SHARED_STATE_DIR / "reminders"))
  
 
 @app.route("/auth/v1/register-user", methods=["POST"])
@@ -45,7 +75,6 @@ def register_newuser():
      else: 
          success, message = save_user_uploaded_file(
              file=profile_image,
-             storage_path=app.config["UPLOAD_FOLDER"],
              required_extensions=app.config["ALLOWED_IMAGE_FILES"]
          )
          if not success:
@@ -102,12 +131,9 @@ def chat_messages():
     user_input = request.form.get("user_input")
     user_uploaded_doc = request.files.get("user_uploaded_file")
 
-    saved_file_path = None
+    saved_file_name = None
     if user_uploaded_doc:
-        filename = secure_filename(user_uploaded_doc.filename)
-        os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-        saved_file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        user_uploaded_doc.save(saved_file_path)
+        saved_file_name = BLOB_STORE.put_upload(user_uploaded_doc)
 
     socketio.emit(
         "stream_start",
@@ -115,23 +141,34 @@ def chat_messages():
         room=user_id
     )
 
-    # ✅ PROPER ASYNC BRIDGE
-    status, response = asyncio.run(
+    streamed = []
+
+    def forward_token(token: str) -> None:
+        streamed.append(token)
+        socketio.emit("stream_chunk", {"chunk": token, "user_id": user_id}, room=user_id)
+
+    # ✅ PROPER ASYNC BRIDGE (shared, long-lived event loop)
+    status, response = run_coroutine(
         get_ai_response(
             user_id=user_id,
             user_input=user_input,
-            user_uploaded_file=saved_file_path
+            user_uploaded_file=saved_file_name,
+            on_token=forward_token
         )
     )
 
     if status:
+        # routes that can't stream (reports, images) arrive as one chunk
+        if not streamed:
+            socketio.emit("stream_chunk", {"chunk": str(response), "user_id": user_id}, room=user_id)
         socketio.emit(
-            "ai_response",
+            "stream_end",
             {"response": str(response), "user_id": user_id},
             room=user_id
         )
         return jsonify({"response": str(response)}), 200
 
+    socketio.emit("stream_end", {"user_id": user_id}, room=user_id)
     socketio.emit(
         "error",
         {"error": str(response), "user_id": user_id},
@@ -141,6 +178,22 @@ def chat_messages():
 
 
 
+@app.route("/chat/v1/router-stats", methods=["GET"])
+def router_stats():
+    return jsonify(PRE_ROUTER.stats()), 200
+
+
+@app.route("/chat/v1/answer-cache-stats", methods=["GET"])
+def answer_cache_stats():
+    return jsonify(ANSWER_CACHE.stats()), 200
+
+
+@app.route("/chat/v1/context-stats", methods=["GET"])
+def context_stats():
+    return jsonify(CONTEXT_TIMINGS.summary()), 200
+
+
+
 @socketio.on("/chat/v1/ai/stream-chat") 
 def stream_chat(data):
     user_id = data.get("user_id")
@@ -151,15 +204,70 @@ def stream_chat(data):
     join_room(user_id)
     emit("connected", {"message": "Chat stream connected"})
 
-    
-    status, conversation = load_conversation_to_validated_user(user_id)
+    limit = parse_page_limit(data.get("limit"))
+    if limit is None:
+        emit("error", {"error": "limit must be an integer"})
+        return
+
+    # First connect: the newest page as new_message plus its history_cursor.
+    # Reconnect with the "since" cursor: only the messages added since then,
+    # as a history_delta the client appends.
+    since = data.get("since")
+    status, page = load_conversation_page(user_id, since=since, limit=limit)
+    if status and since and page["reset"]:
+        # the log was deleted or replaced since that cursor; start over
+        status, page = load_conversation_page(user_id, limit=limit)
+        page["reset"] = True
+    if not status:
+        emit("error", {"error": "Could not load history"})
+    elif since and not page["reset"]:
+        emit("history_delta", page)
+    else:
+        emit("new_message", page["messages"])
+        emit("history_cursor", {key: page[key] for key in ("before", "cursor", "has_more", "reset")})
+
+
+@socketio.on("/chat/v1/ai/history")
+def stream_history_page(data):
+    """Older messages for infinite scroll: pass the "before" cursor of the oldest page loaded."""
+    user_id = data.get("user_id")
+    if not user_id:
+        emit("error", {"error": "user_id is required"})
+        return
+
+    limit = parse_page_limit(data.get("limit"))
+    if limit is None:
+        emit("error", {"error": "limit must be an integer"})
+        return
+
+    status, page = load_conversation_page(user_id, before=data.get("before"), limit=limit)
     if status:
-        # for msg in conversation:
-            emit("new_message", conversation)
+        emit("history_page", page)
     else:
         emit("error", {"error": "Could not load history"})
 
 
+@app.route("/chat/v1/history", methods=["GET"])
+def conversation_history():
+    user_id = request.args.get("user_id")
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+
+    limit = parse_page_limit(request.args.get("limit"))
+    if limit is None:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    status, page = load_conversation_page(
+        user_id,
+        before=request.args.get("before"),
+        since=request.args.get("since"),
+        limit=limit,
+    )
+    if not status:
+        return jsonify({"error": "Could not load history"}), 500
+    return jsonify(page), 200
+
+
 
 
 
@@ -218,29 +326,110 @@ def create_user_schedule():
 
 
  
-user_sockets = {} 
+# reminder sockets held by this worker: user_id -> sids, and sid -> user_id
+user_sockets = {}
+socket_users = {}
+USER_SOCKETS_LOCK = Lock()
+
+
+def track_socket(user_id, sid) -> bool:
+    """Remember ``sid`` as a socket of ``user_id``; True if it is the user's first one here"""
+    with USER_SOCKETS_LOCK:
+        previous = socket_users.get(sid)
+        if previous == user_id:
+            return False
+        socket_users[sid] = user_id
+        sids = user_sockets.setdefault(user_id, set())
+        sids.add(sid)
+        first = len(sids) == 1
+    if previous is not None:
+        release_socket_of(previous, sid)
+    return first
+
+
+def release_socket_of(user_id, sid) -> None:
+    with USER_SOCKETS_LOCK:
+        sids = user_sockets.get(user_id)
+        if sids is None or sid not in sids:
+            return
+        sids.discard(sid)
+        last = not sids
+        if last:
+            del user_sockets[user_id]
+    if last:
+        # their last tab on this worker closed; stop scheduling for them here
+        REMINDER_SCHEDULER.unwatch(user_id)
+
+
+def release_socket(sid) -> None:
+    with USER_SOCKETS_LOCK:
+        user_id = socket_users.pop(sid, None)
+    if user_id is not None:
+        release_socket_of(user_id, sid)
+
+
+def reminder_room(user_id):
+    return f"reminders:{user_id}"
+
+
+def has_live_socket(user_id) -> bool:
+    """True if some worker currently holds a reminder socket of ``user_id``"""
+    if REMINDER_SCHEDULER.shared is not None:
+        return REMINDER_SCHEDULER.shared.is_online(user_id)
+    with USER_SOCKETS_LOCK:
+        return bool(user_sockets.get(user_id))
 
  
 def monitor_reminders():
-    """Continuous loop checking reminders for all connected users"""
-    while True:
-    
-        for user_id, socket_id in list(user_sockets.items()):
-            reminder_due, reminder_title = check_user_reminders(user_id)
-            
-            if reminder_due:
-                socketio.emit(
-                    "schedule_alert",
-                    {
-                        "success": True,
-                        "reminder_title": reminder_title,
-                        "user_id": user_id
-                    },
-                    room=socket_id 
-                )
-                print(f"Reminder sent to user {user_id}: {reminder_title}")
-        
-        time.sleep(1)  
+    """Deliver reminders as the scheduler reports them due (no per-second polling)"""
+
+    def send_reminder(user_id, fire_at, schedule_id, schedule):
+        # only claim it if someone can receive it; otherwise it stays
+        # undelivered and is replayed on register within the grace window
+        if not has_live_socket(user_id):
+            return
+        if not DELIVERY_LEDGER.claim(user_id, schedule_id, fire_at):
+            return
+        reminder_title = schedule_title(schedule)
+        socketio.emit(
+            "schedule_alert",
+            {
+                "success": True,
+                "reminder_title": reminder_title,
+                "user_id": user_id
+            },
+            room=reminder_room(user_id)
+        )
+        print(f"Reminder sent to user {user_id}: {reminder_title}")
+
+    REMINDER_SCHEDULER.run(send_reminder)
+
+
+def replay_missed_reminders(user_id):
+    """Send every undelivered occurrence from the grace window as one batched alert"""
+    now = datetime.now()
+    since = now - timedelta(minutes=app.config["REMINDER_GRACE_MINUTES"])
+
+    missed = [
+        {"reminder_title": schedule_title(schedule), "due_at": fire_at.isoformat()}
+        for fire_at, schedule_id, schedule in REMINDER_SCHEDULER.missed_occurrences(user_id, since, now)
+        if DELIVERY_LEDGER.claim(user_id, schedule_id, fire_at)
+    ]
+    if not missed:
+        return
+
+    socketio.emit(
+        "schedule_alert",
+        {
+            "success": True,
+            "reminder_title": ", ".join(item["reminder_title"] for item in missed),
+            "reminders": missed,
+            "missed": True,
+            "user_id": user_id
+        },
+        room=reminder_room(user_id)
+    )
+    print(f"Replayed {len(missed)} missed reminder(s) to user {user_id}")
 
  
 
@@ -248,17 +437,18 @@ def monitor_reminders():
 def handle_register(data):
     user_id = data.get('user_id')
     if user_id:
-        user_sockets[user_id] = request.sid
-        join_room(request.sid)  
+        if not is_valid_user_id(user_id) or get_user_repository().get_by_id(user_id) is None:
+            emit('error', {'error': 'Unknown user_id'})
+            return
+        join_room(reminder_room(user_id))
+        if track_socket(user_id, request.sid):
+            REMINDER_SCHEDULER.watch(user_id)
         emit('registered', {'user_id': user_id, 'status': 'monitoring_started'})
+        replay_missed_reminders(user_id)
 
 @socketio.on('disconnect_notification_user')
-def handle_disconnect():
- 
-    for user_id, socket_id in list(user_sockets.items()):
-        if socket_id == request.sid:
-            del user_sockets[user_id]
-            break
+def handle_disconnect_notification_user():
+    release_socket(request.sid)
 
 
  
@@ -269,7 +459,8 @@ def handle_connect():
 
 @socketio.on("disconnect")
 def handle_disconnect():
-    pass
+    # closing the tab only fires this built-in event
+    release_socket(request.sid)
 
 @app.route("/user/v1/dashboard/<string:user_id>", methods=["GET"])
 def get_dashboard(user_id):
@@ -312,7 +503,7 @@ def get_user_profile():
  
 @app.route("/uploads/<filename>")
 def serve_uploaded_file(filename):
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+    return send_asset(filename)
 
 
  
@@ -351,18 +542,35 @@ def delete_chat_conversation():
 
 @app.route('/files/download/<filename>')
 def download_file(filename):
-    full_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    if not os.path.isfile(full_path):
-        return abort(404)
-    return send_from_directory(
-        directory=app.config["UPLOAD_FOLDER"],
-        path=filename,
-        as_attachment=True
-    )
+    # blobs are named by hash; the link carries the name the user sees
+    return send_asset(filename, as_attachment=True, download_name=request.args.get("name"))
+
+
+
+def run_reminder_leader():
+    """Run monitor_reminders in exactly one worker; standbys retry to take over"""
+    if not SCALED_OUT:
+        monitor_reminders()
+        return
+    while not REMINDER_LEADER.try_acquire():
+        time.sleep(30)
+    print(f"Worker {os.getpid()} elected reminder leader")
+    monitor_reminders()
+
+
+def reload_llm_on_signal(signum, frame):
+    reload_llm()
+    print(f"Worker {os.getpid()} reloaded LLM settings")
+
 
+def start_background_services():
+    """Call once per worker process (e.g. from a gunicorn post_fork hook)"""
+    # `kill -USR1 <pid>` re-reads utilities/secret/.env (API key, model) without a restart
+    signal.signal(signal.SIGUSR1, reload_llm_on_signal)
+    monitor_thread = Thread(target=run_reminder_leader, daemon=True)
+    monitor_thread.start()
 
 
 if __name__ == "__main__":
-    # monitor_thread = threading.Thread(target=monitor_reminders, daemon=True)
-    # monitor_thread.start()
+    start_background_services()
     socketio.run(app, debug=False,port=8001)
\ No newline at end of file
@@ -1,5 +1,40 @@
+import os
 import pathlib 
 import random, string
+import time
+
+
+SECRET_DIR = pathlib.Path(__file__).resolve().parents[2] / "utilities" / "secret"
+
+
+def load_signing_key(path: pathlib.Path = SECRET_DIR / "jwt_signing.key") -> str:
+    """
+    JWT signing key shared by every worker.
+
+    HEALTHCARE_JWT_SECRET wins when set. Otherwise the key is read from
+    ``path``. The first worker to start creates that file exclusively, so
+    concurrent workers all end up with the same key.
+    """
+    secret = os.getenv("HEALTHCARE_JWT_SECRET", "").strip()
+    if secret:
+        return secret
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            secret = path.read_text(encoding="utf-8").strip()
+            if secret:
+                return secret
+            # another worker created the file but hasn't written it yet
+            time.sleep(0.01)
+        raise RuntimeError(f"Signing key file {path} is empty")
+
+    secret = "".join(random.SystemRandom().choices(string.ascii_letters + string.digits, k=64))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(secret)
+    return secret
 
 
  
@@ -7,9 +42,118 @@ class Config:
     UPLOAD_FOLDER = pathlib.Path(__file__).resolve().parents[2] / "database" / "uploads" 
     ALLOWED_IMAGE_FILES = (".png"  ,".jpeg", ".jpg")
     ALLOWED_DOC_FILES = (".pdf" , ".txt" )
+    # uploads and generated files, content-addressed and sharded by hash prefix
+    BLOB_STORE_DIR = pathlib.Path(os.getenv("HEALTHCARE_BLOB_STORE_DIR", str(UPLOAD_FOLDER / "objects")))
+
+    SECRET_KEY_TOKEN = load_signing_key()
+
+    # "json" keeps users in database/data.json, "sqlite" uses SQLITE_PATH
+    # (import an existing data.json with database/migrate_to_sqlite.py).
+    STORAGE_BACKEND = os.getenv("HEALTHCARE_STORAGE_BACKEND", "json").strip().lower()
+    SQLITE_PATH = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_SQLITE_PATH",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "healthcare.db"),
+        )
+    )
+
+    # Conversation logs are append-only JSONL. "always" fsyncs every turn,
+    # "never" leaves flushing to the OS.
+    CONVERSATION_FSYNC = os.getenv("HEALTHCARE_CONVERSATION_FSYNC", "never").strip().lower()
+
+    # "retrieval" puts only the REFERENCE_TOP_K best matching knowledge.json
+    # entries into the prompts, "full" sends the whole corpus every turn.
+    REFERENCE_MODE = os.getenv("HEALTHCARE_REFERENCE_MODE", "retrieval").strip().lower()
+    REFERENCE_TOP_K = int(os.getenv("HEALTHCARE_REFERENCE_TOP_K", "5"))
+
+    # Local keyword/linear pre-router; the LLM router is only called when it
+    # is less than PRE_ROUTER_THRESHOLD confident.
+    PRE_ROUTER_ENABLED = os.getenv("HEALTHCARE_PRE_ROUTER", "1").strip() not in ("0", "false", "no")
+    PRE_ROUTER_THRESHOLD = float(os.getenv("HEALTHCARE_PRE_ROUTER_THRESHOLD", "0.85"))
+
+    # Reminders missed while a user was offline (or the server was down) are
+    # replayed on reconnect if they came due within this many minutes.
+    REMINDER_GRACE_MINUTES = int(os.getenv("HEALTHCARE_REMINDER_GRACE_MINUTES", "60"))
+
+    # Scale-out: a Socket.IO message queue URL (redis://..., amqp://..., or
+    # local:///some/dir for the single-host Unix-socket queue). When set,
+    # reminder delivery is coordinated through SHARED_STATE_DIR and only the
+    # worker holding the leader lock runs the reminder scheduler.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("HEALTHCARE_SOCKETIO_MESSAGE_QUEUE", "").strip()
+    SHARED_STATE_DIR = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_SHARED_STATE_DIR",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "shared"),
+        )
+    )
+
+    # Uploaded PDFs: every page is extracted; long documents are split across
+    # DOCUMENT_WORKERS processes and the text is cached by content hash.
+    DOCUMENT_WORKERS = int(os.getenv("HEALTHCARE_DOCUMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    DOCUMENT_CACHE_DIR = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_DOCUMENT_CACHE_DIR",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "document_cache"),
+        )
+    )
+
+    # Uploaded documents are chunked and indexed per user; each turn only the
+    # DOCUMENT_TOP_K chunks that best match the question go into the prompt.
+    DOCUMENT_INDEX_DIR = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_DOCUMENT_INDEX_DIR",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "document_index"),
+        )
+    )
+    DOCUMENT_TOP_K = int(os.getenv("HEALTHCARE_DOCUMENT_TOP_K", "6"))
+    DOCUMENT_CHUNK_WORDS = int(os.getenv("HEALTHCARE_DOCUMENT_CHUNK_WORDS", "200"))
+    # Without a new upload, the last attached document is only reused if it
+    # was attached within this many user turns or the message refers to it.
+    DOCUMENT_FOLLOW_UP_TURNS = int(os.getenv("HEALTHCARE_DOCUMENT_FOLLOW_UP_TURNS", "3"))
+
+    # write_report renders PDFs in a pool of REPORT_WORKERS processes; the
+    # rendered file for each distinct HTML body is remembered in REPORT_CACHE_DIR.
+    REPORT_WORKERS = int(os.getenv("HEALTHCARE_REPORT_WORKERS", "2"))
+    REPORT_CACHE_DIR = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_REPORT_CACHE_DIR",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "report_cache"),
+        )
+    )
+
+    # Freepik image generation; point FREEPIK_BASE_URL at a mock server to
+    # benchmark without the real API.
+    FREEPIK_BASE_URL = os.getenv("HEALTHCARE_FREEPIK_BASE_URL", "https://api.freepik.com").strip()
+    FREEPIK_DEADLINE_SECONDS = float(os.getenv("HEALTHCARE_FREEPIK_DEADLINE_SECONDS", "60"))
 
-    SECRET_KEY_TOKEN = "".join(random.choices(string.ascii_letters + string.digits, k=30))
+    # generated images by normalized prompt (kept out of blob garbage collection)
+    IMAGE_CACHE_DIR = pathlib.Path(
+        os.getenv(
+            "HEALTHCARE_IMAGE_CACHE_DIR",
+            str(pathlib.Path(__file__).resolve().parents[2] / "database" / "image_cache"),
+        )
+    )
 
+    # Who sends /uploads and /files/download bytes: "" (this process),
+    # "x-accel" (nginx, internal location ASSET_ACCEL_PREFIX aliased to
+    # UPLOAD_FOLDER) or "x-sendfile" (Apache/lighttpd mod_xsendfile).
+    ASSET_OFFLOAD = os.getenv("HEALTHCARE_ASSET_OFFLOAD", "").strip().lower()
+    ASSET_ACCEL_PREFIX = os.getenv("HEALTHCARE_ASSET_ACCEL_PREFIX", "/protected-uploads/").strip()
+    USE_X_SENDFILE = ASSET_OFFLOAD == "x-sendfile"
 
+    # Cache of GeneralHealth answers for self-contained questions (no upload,
+    # no prior messages by default). ANSWER_CACHE_DIR adds a disk tier shared by workers.
+    ANSWER_CACHE_ENABLED = os.getenv("HEALTHCARE_ANSWER_CACHE", "1").strip() not in ("0", "false", "no")
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("HEALTHCARE_ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("HEALTHCARE_ANSWER_CACHE_MAX_ENTRIES", "1024"))
+    ANSWER_CACHE_MAX_HISTORY = int(os.getenv("HEALTHCARE_ANSWER_CACHE_MAX_HISTORY", "0"))
+    ANSWER_CACHE_DIR = os.getenv("HEALTHCARE_ANSWER_CACHE_DIR", "").strip() or None
 
- 
\ No newline at end of file
+    # Conversation history in prompts: the last HISTORY_KEEP_TURNS turns
+    # verbatim within HISTORY_TOKEN_BUDGET, older turns folded into a rolling
+    # summary of at most HISTORY_SUMMARY_TOKENS ("local" extractive or "llm").
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HEALTHCARE_HISTORY_TOKEN_BUDGET", "2000"))
+    HISTORY_KEEP_TURNS = int(os.getenv("HEALTHCARE_HISTORY_KEEP_TURNS", "6"))
+    HISTORY_SUMMARY_TOKENS = int(os.getenv("HEALTHCARE_HISTORY_SUMMARY_TOKENS", "400"))
+    HISTORY_SUMMARIZER = os.getenv("HEALTHCARE_HISTORY_SUMMARIZER", "local").strip().lower()
+    HISTORY_TOKENIZER = os.getenv("HEALTHCARE_HISTORY_TOKENIZER", "estimate").strip().lower()
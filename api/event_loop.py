@@ -0,0 +1,71 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundEventLoop:
+    """
+    One asyncio event loop running for the lifetime of the process.
+
+    Flask handlers are synchronous, so they submit coroutines here instead of
+    calling ``asyncio.run`` (which builds and tears down a loop per request).
+    Async clients, connection pools and caches created by those coroutines
+    stay bound to this loop and are reused by later requests, and coroutines
+    from concurrent requests interleave on it.
+    """
+
+    def __init__(self, name: str = "healthcare-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self.start()
+        return self._loop
+
+    def start(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def submit(self, coro: Coroutine):
+        """Schedule ``coro`` on the loop and return a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the loop and block the calling thread for its result."""
+        return self.submit(coro).result(timeout)
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+EVENT_LOOP = BackgroundEventLoop()
+atexit.register(EVENT_LOOP.stop)
+
+
+def run_coroutine(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    return EVENT_LOOP.run(coro, timeout)
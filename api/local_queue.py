@@ -0,0 +1,91 @@
+import atexit
+import json
+import os
+import pathlib
+import socket
+import threading
+import uuid
+
+import socketio
+
+
+class LocalSocketManager(socketio.PubSubManager):
+    """
+    Socket.IO pub/sub backend over Unix datagram sockets in one directory.
+
+    Every worker binds ``<directory>/<uuid>.sock`` and publishes by sending
+    the message to every other socket in the directory. The socket is only
+    bound once the server starts listening (the first client connection),
+    so processes that merely import api.py, such as spawned pool workers,
+    never appear as peers. It needs no broker,
+    so it stands in for Redis/AMQP in tests and for several workers on a
+    single host. Select it with ``HEALTHCARE_SOCKETIO_MESSAGE_QUEUE=local:///path``.
+    A message must fit in one datagram (the kernel's socket buffer limit).
+    For multi-host deployments or large payloads use a real broker URL.
+    """
+
+    name = "local"
+    MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, url: str = "local:///tmp/healthcare-socketio", channel: str = "socketio",
+                 write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.directory = pathlib.Path(url[len("local://"):] or "/tmp/healthcare-socketio") / channel
+        self.address = str(self.directory / f"{uuid.uuid4().hex}.sock")
+        self._receiver = None
+        self._sender = None
+        self._lock = threading.Lock()
+
+    def _new_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.MAX_MESSAGE_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.MAX_MESSAGE_SIZE)
+        return sock
+
+    def _peers(self) -> list[str]:
+        return [
+            str(path) for path in self.directory.glob("*.sock")
+            if str(path) != self.address
+        ]
+
+    def _publish(self, data):
+        payload = json.dumps(data).encode("utf-8")
+        with self._lock:
+            if self._sender is None:
+                # sending needs no bound address; never block on a peer that stopped reading
+                self._sender = self._new_socket()
+                self._sender.setblocking(False)
+        for peer in self._peers():
+            try:
+                self._sender.sendto(payload, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # the worker behind this socket is gone
+                try:
+                    os.remove(peer)
+                except FileNotFoundError:
+                    pass
+            except OSError as e:
+                # EMSGSIZE (over the datagram limit) or EAGAIN (peer's buffer full); don't fail the request
+                self._get_logger().error(f"local queue: cannot publish {len(payload)} bytes to {peer}: {e}")
+
+    def _listen(self):
+        # runs in the listener thread started by initialize(), i.e. only in a serving process
+        with self._lock:
+            if self._receiver is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                receiver = self._new_socket()
+                receiver.bind(self.address)
+                self._receiver = receiver
+                atexit.register(self.close)
+        while True:
+            yield self._receiver.recv(self.MAX_MESSAGE_SIZE)
+
+    def close(self) -> None:
+        for sock in (self._receiver, self._sender):
+            if sock is not None:
+                sock.close()
+        if self._receiver is not None:
+            try:
+                os.remove(self.address)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,86 @@
+import mimetypes
+import os
+import pathlib
+import sys
+from typing import Optional
+
+from flask import Response, abort, request, send_file
+from werkzeug.utils import secure_filename
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from configuration.config import Config
+from database.blob_store import BLOB_STORE
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _cache_headers(response: Response, name: str) -> Response:
+    if BLOB_STORE.is_blob_name(name):
+        # content-addressed: the bytes behind this URL can never change
+        response.set_etag(name.split(".", 1)[0])
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # legacy flat uploads can be overwritten; always revalidate
+        response.cache_control.no_cache = True
+    return response
+
+
+def _offload(path: pathlib.Path, name: str, as_attachment: bool, download_name: Optional[str]) -> Optional[Response]:
+    """X-Accel-Redirect response for nginx, or None if the file isn't under UPLOAD_FOLDER."""
+    try:
+        relative = path.resolve().relative_to(pathlib.Path(Config.UPLOAD_FOLDER).resolve())
+    except ValueError:
+        return None
+
+    response = Response(status=200)
+    response.headers["X-Accel-Redirect"] = Config.ASSET_ACCEL_PREFIX.rstrip("/") + "/" + relative.as_posix()
+    response.headers["Content-Type"] = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if as_attachment:
+        response.headers["Content-Disposition"] = f'attachment; filename="{download_name or name}"'
+    return _cache_headers(response, name)
+
+
+def send_asset(name: str, as_attachment: bool = False, download_name: Optional[str] = None):
+    """
+    Serve an upload or generated file by name.
+
+    - Content-addressed blobs get their hash as a strong ETag and a one-year
+      ``immutable`` Cache-Control. A matching If-None-Match is answered
+      with 304 before the file is touched.
+    - Byte ranges and other conditional requests go through werkzeug
+      (``send_file(conditional=True)``), so large PDFs can be resumed or
+      streamed.
+    - With ASSET_OFFLOAD set to ``x-accel`` or ``x-sendfile``, the front
+      proxy sends the file bytes instead of the Python worker.
+    """
+    name = os.path.basename(name)
+    download_name = secure_filename(download_name or "") or name
+
+    if BLOB_STORE.is_blob_name(name) and name.split(".", 1)[0] in request.if_none_match:
+        return _cache_headers(Response(status=304), name)
+
+    path = BLOB_STORE.locate(name)
+    if path is None:
+        return abort(404)
+
+    if Config.ASSET_OFFLOAD == "x-accel":
+        response = _offload(path, name, as_attachment, download_name)
+        if response is not None:
+            return response
+
+    # with USE_X_SENDFILE (ASSET_OFFLOAD=x-sendfile) werkzeug only sets the header
+    try:
+        response = send_file(
+            path,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=name.split(".", 1)[0] if BLOB_STORE.is_blob_name(name) else True,
+        )
+    except FileNotFoundError:
+        return abort(404)
+    return _cache_headers(response, name)
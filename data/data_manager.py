@@ -1,60 +1,30 @@
-import json
 import pathlib
+import sys
+from typing import Optional
 
-def load_reference_data() -> str:
-    DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "documents" / "knowledge.json"
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from data.knowledge_service import KNOWLEDGE_SERVICE
 
-    with open(DATA_PATH, "r") as file:
-        data = json.load(file)
 
-    # Build a combined docstring for ALL objects in the JSON list
-    all_docs = []
+def load_reference_data(query: Optional[str] = None, k: Optional[int] = None) -> str:
+    return get_reference_data(query, k)[0]
 
-    for disease in data:
-        disease_name = disease.get("disease", "Unknown Disease")
-        signs = disease.get("signs", [])
-        causes = disease.get("causes", [])
-        prevention = disease.get("prevention", [])
-        treatment = disease.get("treatment", [])
-        advice = disease.get("advice", [])
-        malawi_context = disease.get("malawi_context", [])
 
-        
-        block = f'''
-------------------------
-Disease: {disease_name}
+def get_reference_data(query: Optional[str] = None, k: Optional[int] = None) -> tuple[str, str]:
+    """
+    Reference data for the prompts and the knowledge version it came from.
 
-SIGNS:
-{_format_list(signs)}
+    In ``Config.REFERENCE_MODE == "full"`` (or without a query) every disease
+    block is returned. In ``"retrieval"`` mode only the ``k`` blocks that best
+    match ``query`` (default ``Config.REFERENCE_TOP_K``) are returned.
+    """
+    snapshot = KNOWLEDGE_SERVICE.snapshot()
+    if Config.REFERENCE_MODE != "retrieval" or not query:
+        return snapshot.full_text, snapshot.version
 
-CAUSES:
-{_format_list(causes)}
-
-PREVENTION:
-{_format_list(prevention)}
-
-TREATMENT:
-{_format_list(treatment)}
-
-ADVICE:
-{_format_list(advice)}
-
-MALAWI CONTEXT:
-{_format_list(malawi_context)}
-------------------------
-'''.strip()
-
-        all_docs.append(block)
-       
-    
-    return "\n\n".join(all_docs)
-
-
-def _format_list(items):
-    """Helper: formats a list of strings into clean bullet points."""
-    if not items:
-        return "  - (Not provided)"
-    return "\n".join(f"  - {item}" for item in items)
-
- 
-# print(load_disease_docstring())
+    blocks = snapshot.top_k(query, k or Config.REFERENCE_TOP_K)
+    if not blocks:
+        return "(no closely matching reference entries)", snapshot.version
+    return "\n\n".join(blocks), snapshot.version
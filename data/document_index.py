@@ -0,0 +1,153 @@
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from data.retrieval import BM25Index
+from tools.document_extraction import DOCUMENT_EXTRACTOR
+
+
+def chunk_pages(pages: list[str], max_words: int = 200, overlap: int = 40) -> list[dict]:
+    """Split page texts into overlapping word windows that remember their page."""
+    step = max(1, max_words - overlap)
+    chunks = []
+    for page_number, text in enumerate(pages, start=1):
+        words = text.split()
+        for start in range(0, len(words), step):
+            chunks.append({"page": page_number, "text": " ".join(words[start:start + max_words])})
+            if start + max_words >= len(words):
+                break
+    return chunks
+
+
+def read_document_pages(filepath: str) -> list[str]:
+    if filepath.endswith(".pdf"):
+        return list(DOCUMENT_EXTRACTOR.iter_pages(filepath))
+    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+        return [f.read()]
+
+
+DOCUMENT_REFERENCE_PATTERN = re.compile(
+    r"\b(document|doc|file|pdf|report|upload\w*|attach\w*|results?|lab|labs|scan|page)s?\b",
+    re.IGNORECASE,
+)
+
+
+def last_uploaded_file(history_entries: list[dict], user_input: str = "", within_turns: int = 3) -> Optional[str]:
+    """
+    Most recent file the user attached, for follow-ups: if it was attached
+    within the last ``within_turns`` user turns, or ``user_input`` refers to
+    a document. Otherwise None, so an unrelated later question doesn't carry
+    an old document.
+    """
+    turns = 0
+    for item in reversed(history_entries):
+        if item.get("role") != "user":
+            continue
+        turns += 1
+        if item.get("uploaded_file"):
+            if turns <= within_turns or DOCUMENT_REFERENCE_PATTERN.search(user_input or ""):
+                return item["uploaded_file"]
+            return None
+    return None
+
+
+class DocumentIndex:
+    """Chunks of one uploaded document plus a BM25 index over them."""
+
+    def __init__(self, filename: str, chunks: list[dict]):
+        self.filename = filename
+        self.chunks = chunks
+        self.index = BM25Index([chunk["text"] for chunk in chunks])
+
+    def passages(self, query: str, k: int) -> str:
+        """The ``k`` most relevant chunks, in document order (all of them for short documents)."""
+        if len(self.chunks) <= k:
+            selected = range(len(self.chunks))
+        else:
+            hits = [doc_id for doc_id, _ in self.index.search(query, k)]
+            # nothing matched (e.g. "summarise this"): fall back to the opening chunks
+            selected = sorted(hits) if hits else range(k)
+        return "\n\n".join(
+            f"[{self.filename}, page {self.chunks[i]['page']}]\n{self.chunks[i]['text']}"
+            for i in selected
+        )
+
+
+class DocumentIndexService:
+    """
+    Per-user chunk indexes of uploaded documents.
+
+    A document is chunked once. The chunks are written to
+    ``<root>/<user_id>/<file name>.json`` together with the file's
+    (mtime, size) stamp, and the index is rebuilt only when the upload
+    changes. Each turn then puts only the top-k chunks for the user's
+    question into the prompt, instead of the whole document. Recently used
+    indexes stay in memory.
+    """
+
+    def __init__(self, root: pathlib.Path, top_k: int = 6, chunk_words: int = 200, memory_entries: int = 32):
+        self.root = pathlib.Path(root)
+        self.top_k = top_k
+        self.chunk_words = chunk_words
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[tuple, DocumentIndex] = OrderedDict()
+
+    def _index_path(self, user_id: str, filename: str) -> pathlib.Path:
+        return self.root / str(user_id) / f"{filename}.json"
+
+    def _load(self, user_id: str, filepath: str) -> DocumentIndex:
+        stat = os.stat(filepath)
+        filename = os.path.basename(filepath)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        memory_key = (str(user_id), filename, tuple(stamp))
+
+        with self._lock:
+            if memory_key in self._memory:
+                self._memory.move_to_end(memory_key)
+                return self._memory[memory_key]
+
+        index_path = self._index_path(user_id, filename)
+        chunks = None
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("stamp") == stamp and stored.get("chunk_words") == self.chunk_words:
+                chunks = stored["chunks"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        if chunks is None:
+            chunks = chunk_pages(read_document_pages(filepath), max_words=self.chunk_words)
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "chunk_words": self.chunk_words, "chunks": chunks}, f)
+            os.replace(tmp_path, index_path)
+
+        document = DocumentIndex(filename, chunks)
+        with self._lock:
+            self._memory[memory_key] = document
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return document
+
+    def relevant_passages(self, user_id: str, filepath: str, query: str, k: Optional[int] = None) -> str:
+        if not filepath or not filepath.endswith(Config.ALLOWED_DOC_FILES) or not os.path.isfile(filepath):
+            return ""
+        return self._load(user_id, filepath).passages(query, k or self.top_k)
+
+
+DOCUMENT_INDEX = DocumentIndexService(
+    root=Config.DOCUMENT_INDEX_DIR,
+    top_k=Config.DOCUMENT_TOP_K,
+    chunk_words=Config.DOCUMENT_CHUNK_WORDS,
+)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import threading
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from data.retrieval import BM25Index
+
+
+DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "documents" / "knowledge.json"
+
+
+class KnowledgeSnapshot:
+    """
+    Immutable, fully prepared view of one version of knowledge.json.
+
+    ``version`` is a content hash of the file, stable across processes, so it
+    can be used in cache keys. ``blocks`` holds the formatted prompt block of
+    every disease and ``full_text`` their concatenation.
+    """
+
+    __slots__ = ("version", "entries", "blocks", "full_text", "index")
+
+    def __init__(self, raw: bytes):
+        self.version = hashlib.sha1(raw).hexdigest()[:12]
+        self.entries = json.loads(raw)
+        self.blocks = [format_disease(disease) for disease in self.entries]
+        self.full_text = "\n\n".join(self.blocks)
+        self.index = BM25Index([_index_text(disease) for disease in self.entries])
+
+    def top_k(self, query: str, k: int) -> list[str]:
+        return [self.blocks[doc_id] for doc_id, _ in self.index.search(query, k)]
+
+
+class KnowledgeService:
+    """
+    Parses and formats knowledge.json once and hot-reloads it on change.
+
+    Each ``snapshot()`` call costs one ``os.stat``. When the file's
+    (mtime, size) stamp changes a new snapshot is built and swapped in with a
+    single assignment, so readers always see one complete version. A
+    version that fails to parse is logged and skipped; the previous snapshot
+    stays in use until the file changes again.
+    """
+
+    def __init__(self, path: pathlib.Path = DATA_PATH):
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshot = None
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self) -> KnowledgeSnapshot:
+        stamp = self._file_stamp()
+        if stamp == self._stamp and self._snapshot is not None:
+            return self._snapshot
+
+        with self._lock:
+            if stamp != self._stamp or self._snapshot is None:
+                with open(self.path, "rb") as file:
+                    raw = file.read()
+                try:
+                    snapshot = KnowledgeSnapshot(raw)
+                except (ValueError, TypeError, AttributeError) as e:
+                    # malformed or half-written file: keep the last good version
+                    # and try again once the stamp changes
+                    if self._snapshot is None:
+                        raise
+                    print(f"Could not reload {self.path}, serving version {self._snapshot.version}: {e}")
+                    self._stamp = stamp
+                    return self._snapshot
+                self._snapshot = snapshot
+                self._stamp = stamp
+            return self._snapshot
+
+
+KNOWLEDGE_SERVICE = KnowledgeService()
+
+
+def _index_text(disease: dict) -> str:
+    name = disease.get("disease", "")
+    # the disease name is repeated so a direct mention outweighs a shared symptom
+    return "\n".join([name, name, *disease.get("signs", []), *disease.get("causes", [])])
+
+
+def format_disease(disease: dict) -> str:
+    disease_name = disease.get("disease", "Unknown Disease")
+    signs = disease.get("signs", [])
+    causes = disease.get("causes", [])
+    prevention = disease.get("prevention", [])
+    treatment = disease.get("treatment", [])
+    advice = disease.get("advice", [])
+    malawi_context = disease.get("malawi_context", [])
+
+
+    return f'''
+------------------------
+Disease: {disease_name}
+
+SIGNS:
+{_format_list(signs)}
+
+CAUSES:
+{_format_list(causes)}
+
+PREVENTION:
+{_format_list(prevention)}
+
+TREATMENT:
+{_format_list(treatment)}
+
+ADVICE:
+{_format_list(advice)}
+
+MALAWI CONTEXT:
+{_format_list(malawi_context)}
+------------------------
+'''.strip()
+
+
+def _format_list(items):
+    """Helper: formats a list of strings into clean bullet points."""
+    if not items:
+        return "  - (Not provided)"
+    return "\n".join(f"  - {item}" for item in items)
@@ -0,0 +1,77 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it "
+    "its me my of on or so that the their them there these they this to was what "
+    "when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and len(token) > 1
+    ]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents.
+
+    Postings are stored per term as NumPy arrays of document ids and term
+    frequencies, so scoring a query only touches the documents that contain
+    one of its terms.
+    """
+
+    def __init__(self, documents: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+
+        doc_ids = defaultdict(list)
+        freqs = defaultdict(list)
+        lengths = np.zeros(self.size, dtype=np.float32)
+
+        for doc_id, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, count in counts.items():
+                doc_ids[term].append(doc_id)
+                freqs[term].append(count)
+
+        avg_length = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+        self._norm = k1 * (1 - b + b * lengths / avg_length)
+        self._postings = {
+            term: (
+                np.asarray(doc_ids[term], dtype=np.int32),
+                np.asarray(freqs[term], dtype=np.float32),
+                math.log(1 + (self.size - len(doc_ids[term]) + 0.5) / (len(doc_ids[term]) + 0.5)),
+            )
+            for term in doc_ids
+        }
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            ids, tf, idf = posting
+            scores[ids] += idf * tf * (self.k1 + 1) / (tf + self._norm[ids])
+        return scores
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return up to ``k`` (document id, score) pairs with a positive score, best first."""
+        if self.size == 0 or k <= 0:
+            return []
+        scores = self.scores(query)
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
@@ -0,0 +1,203 @@
+"""
+Content-addressed store for uploaded and generated files.
+
+Usage (garbage collection):
+    python database/blob_store.py [--min-age-hours 24] [--dry-run]
+"""
+import argparse
+import hashlib
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import BinaryIO, Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+
+
+BLOB_NAME_PATTERN = re.compile(r"[0-9a-f]{64}(?:\.[a-z0-9]{1,8})?")
+
+
+def blob_extension(filename: str) -> str:
+    _, extension = os.path.splitext(filename or "")
+    extension = extension.lower()
+    return extension if re.fullmatch(r"\.[a-z0-9]{1,8}", extension) else ""
+
+
+class BlobStore:
+    """
+    Files stored once per distinct content under ``<root>/ab/cd/<sha256><ext>``.
+
+    The blob name (SHA-256 of the content plus the extension) is what user
+    records, conversation entries and URLs refer to. Saving identical bytes
+    twice returns the same name and stores them once. The two-level hash
+    prefix keeps every directory small as the number of files grows.
+
+    Reference counts are not kept on the side. ``reference_counts`` derives
+    them from the sources of truth: profile images in the user store, the
+    attachments and generated links in conversation logs, and any blob name
+    mentioned in a file under ``pin_dirs`` (e.g. the image cache).
+    ``collect_garbage`` deletes blobs that nothing references. It skips
+    blobs younger than ``min_age``, because those may be uploads that are
+    not recorded anywhere yet.
+
+    Legacy files saved flat in the uploads folder still resolve by name.
+    """
+
+    def __init__(self, root: pathlib.Path, legacy_dir: Optional[pathlib.Path] = None,
+                 pin_dirs: tuple[pathlib.Path, ...] = ()):
+        self.root = pathlib.Path(root)
+        self.legacy_dir = pathlib.Path(legacy_dir) if legacy_dir else None
+        self.pin_dirs = tuple(pathlib.Path(path) for path in pin_dirs)
+
+    # -------------------------------
+    # PATHS
+    # -------------------------------
+
+    def blob_path(self, name: str) -> pathlib.Path:
+        return self.root / name[:2] / name[2:4] / name
+
+    def is_blob_name(self, name: str) -> bool:
+        return BLOB_NAME_PATTERN.fullmatch(name or "") is not None
+
+    def locate(self, name: str) -> Optional[pathlib.Path]:
+        """
+        Like ``resolve``, but a valid blob name maps straight to its sharded
+        path without a stat. The caller handles a missing file.
+        """
+        name = os.path.basename(name or "")
+        if self.is_blob_name(name):
+            return self.blob_path(name)
+        return self.resolve(name)
+
+    def resolve(self, name: str) -> Optional[pathlib.Path]:
+        """Path of an existing blob or legacy upload called ``name``, else None."""
+        name = os.path.basename(name or "")
+        if BLOB_NAME_PATTERN.fullmatch(name):
+            path = self.blob_path(name)
+            if path.is_file():
+                return path
+        if self.legacy_dir is not None and name:
+            path = self.legacy_dir / name
+            if path.is_file():
+                return path
+        return None
+
+    # -------------------------------
+    # WRITES
+    # -------------------------------
+
+    def _commit(self, tmp_path: str, digest: str, extension: str) -> str:
+        name = digest + extension
+        path = self.blob_path(name)
+        if path.exists():
+            try:
+                # refresh the mtime so a concurrent GC pass treats it as new
+                os.utime(path)
+            except FileNotFoundError:
+                pass  # GC removed it in between; store our copy instead
+            else:
+                os.remove(tmp_path)
+                return name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)
+        return name
+
+    def put_stream(self, stream: BinaryIO, extension: str = "", chunk_size: int = 1 << 20) -> str:
+        """Hash ``stream`` while copying it into the store and return the blob name."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := stream.read(chunk_size):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest(), extension)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_bytes(self, data: bytes, extension: str = "") -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        return self._commit(tmp_path, hashlib.sha256(data).hexdigest(), extension)
+
+    def put_upload(self, file_storage) -> str:
+        """Store a werkzeug ``FileStorage`` upload, keeping its extension."""
+        return self.put_stream(file_storage.stream, blob_extension(file_storage.filename))
+
+    # -------------------------------
+    # REFERENCES / GC
+    # -------------------------------
+
+    def iter_blobs(self):
+        if not self.root.exists():
+            return
+        for path in self.root.glob("*/*/*"):
+            if BLOB_NAME_PATTERN.fullmatch(path.name):
+                yield path
+
+    def reference_counts(self) -> Counter:
+        from database.user_repository import get_user_repository
+        from memory.conversation import conversation_user_ids, read_conversation_entries
+
+        counts = Counter()
+        for image in get_user_repository().profile_images():
+            counts[os.path.basename(image)] += 1
+
+        for user_id in conversation_user_ids():
+            for entry in read_conversation_entries(user_id):
+                if entry.get("uploaded_file"):
+                    counts[os.path.basename(entry["uploaded_file"])] += 1
+                # generated images and reports are linked from the answer text
+                for name in BLOB_NAME_PATTERN.findall(str(entry.get("content", ""))):
+                    counts[name] += 1
+
+        for pin_dir in self.pin_dirs:
+            if not pin_dir.exists():
+                continue
+            for path in pin_dir.iterdir():
+                if path.is_file():
+                    for name in BLOB_NAME_PATTERN.findall(path.read_text(encoding="utf-8", errors="ignore")):
+                        counts[name] += 1
+        return counts
+
+    def collect_garbage(self, min_age_seconds: float = 24 * 3600, dry_run: bool = False) -> list[str]:
+        """Delete unreferenced blobs older than ``min_age_seconds``; return their names."""
+        counts = self.reference_counts()
+        cutoff = time.time() - min_age_seconds
+        removed = []
+        for path in self.iter_blobs():
+            if counts[path.name] > 0 or path.stat().st_mtime > cutoff:
+                continue
+            removed.append(path.name)
+            if not dry_run:
+                os.remove(path)
+        return removed
+
+
+BLOB_STORE = BlobStore(
+    Config.BLOB_STORE_DIR,
+    legacy_dir=Config.UPLOAD_FOLDER,
+    pin_dirs=(Config.IMAGE_CACHE_DIR,),
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete stored files that no user record or conversation references.")
+    parser.add_argument("--min-age-hours", type=float, default=24.0)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    removed = BLOB_STORE.collect_garbage(args.min_age_hours * 3600, dry_run=args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    print(f"{action} {len(removed)} unreferenced blob(s) from {BLOB_STORE.root}")
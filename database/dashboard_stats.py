@@ -0,0 +1,205 @@
+import fcntl
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import threading
+from datetime import date
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.user_repository import get_user_repository, is_valid_user_id
+
+
+STATS_DIR = pathlib.Path(__file__).resolve().parents[0] / "dashboard"
+TIPS_PATH = pathlib.Path(__file__).resolve().parents[0] / "tips.json"
+
+
+class DashboardStats:
+    """
+    Per-user dashboard aggregates kept up to date on write.
+
+    Each user has a small JSON file with ``message_count``, ``last_activity``,
+    ``schedule_count`` and ``location``. It is updated by the conversation,
+    schedule and profile write paths, so rendering the dashboard is a single
+    stat plus a dictionary lookup. Users without a file yet (data from
+    before this existed) are backfilled once from their conversation log
+    and user record on first view.
+
+    Updates hold a per-user lock and an exclusive ``flock`` on
+    ``<user_id>.lock`` around the read-modify-write, so concurrent threads
+    and workers don't lose increments. Unknown user ids get zeroed stats
+    and never create files.
+    """
+
+    def __init__(self, directory: pathlib.Path = STATS_DIR):
+        self.directory = pathlib.Path(directory)
+        self._lock = threading.Lock()
+        self._user_locks: dict[str, threading.Lock] = {}
+        self._cache: dict[str, tuple[tuple, dict]] = {}
+
+    def _user_lock(self, user_id) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _is_known(user_id) -> bool:
+        return is_valid_user_id(user_id) and get_user_repository().get_by_id(user_id) is not None
+
+    @staticmethod
+    def _empty() -> dict:
+        return {"message_count": 0, "last_activity": None, "schedule_count": 0, "location": "Unknown"}
+
+    def _path(self, user_id) -> pathlib.Path:
+        return self.directory / f"{user_id}.json"
+
+    @staticmethod
+    def _stamp(path: pathlib.Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # every write replaces the file, so the inode changes even within one mtime tick
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read(self, user_id) -> Optional[dict]:
+        path = self._path(user_id)
+        stamp = self._stamp(path)
+        if stamp is None:
+            return None
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not isinstance(stats, dict):
+            return None
+        with self._lock:
+            self._cache[user_id] = (stamp, stats)
+        return stats
+
+    def _write(self, user_id, stats: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(user_id)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, path)
+        stamp = self._stamp(path)
+        with self._lock:
+            self._cache[user_id] = (stamp, stats)
+
+    def _backfill(self, user_id) -> dict:
+        from memory.conversation import read_conversation_entries
+
+        entries = read_conversation_entries(user_id)
+        user = get_user_repository().get_by_id(user_id) or {}
+        # ISO timestamps of the same format sort chronologically
+        times = [item["time"] for item in entries if item.get("time")]
+        return {
+            "message_count": len(entries),
+            "last_activity": max(times) if times else None,
+            "schedule_count": len(user.get("schedule", [])),
+            "location": user.get("location", "Unknown"),
+        }
+
+    def _open_locked(self, user_id):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        f = open(self.directory / f"{user_id}.lock", "a+")
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f
+
+    def _update(self, user_id, change) -> Optional[dict]:
+        """Apply ``change`` and return the written stats, or None for an unknown user."""
+        if not self._is_known(user_id):
+            return None
+        # hooks run after the underlying write, so a backfill already includes it
+        with self._user_lock(user_id), self._open_locked(user_id):
+            stats = self._read(user_id)
+            if stats is None:
+                stats = self._backfill(user_id)
+            else:
+                stats = dict(stats)
+                change(stats)
+            self._write(user_id, stats)
+            return stats
+
+    # -------------------------------
+    # WRITE HOOKS
+    # -------------------------------
+
+    def record_messages(self, user_id, entries: list[dict]) -> None:
+        if not entries:
+            return
+        newest = max((item.get("time") or "" for item in entries), default="") or None
+
+        def change(stats):
+            stats["message_count"] += len(entries)
+            if newest and (stats["last_activity"] is None or newest > stats["last_activity"]):
+                stats["last_activity"] = newest
+
+        self._update(user_id, change)
+
+    def reset_messages(self, user_id) -> None:
+        def change(stats):
+            stats["message_count"] = 0
+            stats["last_activity"] = None
+        self._update(user_id, change)
+
+    def set_schedule_count(self, user_id, count: int) -> None:
+        self._update(user_id, lambda stats: stats.__setitem__("schedule_count", count))
+
+    def set_location(self, user_id, location) -> None:
+        self._update(user_id, lambda stats: stats.__setitem__("location", location))
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+
+    def get(self, user_id) -> dict:
+        if not is_valid_user_id(user_id):
+            return self._empty()
+        stats = self._read(user_id)
+        if stats is None:
+            stats = self._update(user_id, lambda stats: None)
+        return dict(stats) if stats is not None else self._empty()
+
+
+class TipOfTheDay:
+    """Picks one tip per calendar day (the same in every worker) and caches it."""
+
+    def __init__(self, path: pathlib.Path = TIPS_PATH):
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._day = None
+        self._tip = {}
+
+    def get(self, today: Optional[date] = None) -> dict:
+        today = today or date.today()
+        with self._lock:
+            if self._day == today:
+                return self._tip
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    tips = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                tips = []
+            if tips:
+                index = int(hashlib.sha1(today.isoformat().encode("ascii")).hexdigest(), 16) % len(tips)
+                self._tip = tips[index]
+            else:
+                self._tip = {}
+            self._day = today
+            return self._tip
+
+
+DASHBOARD_STATS = DashboardStats()
+TIP_OF_THE_DAY = TipOfTheDay()
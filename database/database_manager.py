@@ -1,29 +1,31 @@
 import json,pathlib 
 import json
 import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.user_repository import get_user_repository
+from database.blob_store import BLOB_STORE
 
 def load_user_profile(user_id) -> str:
-    DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "data.json"
     try:
-        with open(DATA_PATH, "r") as file:
-            meta_data = json.load(file)
-        if len(meta_data) > 0:
-            for user_info in meta_data:
-                if user_info.get("user_id") == user_id:
-                   
-                    name = user_info.get("username", "(unknown)")
-                    location = user_info.get("location", "(unknown)")
-                    email = user_info.get("email", "(unknown)")
-                    gender = user_info.get("gender", "(unknown)")
-                  
+        repository = get_user_repository()
+        if len(repository) > 0:
+            user_info = repository.get_by_id(user_id)
+            if user_info is not None:
+                name = user_info.get("username", "(unknown)")
+                location = user_info.get("location", "(unknown)")
+                email = user_info.get("email", "(unknown)")
+                gender = user_info.get("gender", "(unknown)")
+              
 
-                    return (
-                        f"username: {name}\n"
-                        f"gender: {gender}\n"
-                        f"location: {location}\n"
-                        f"email: {email}\n"
-                         
-                    )
+                return (
+                    f"username: {name}\n"
+                    f"gender: {gender}\n"
+                    f"location: {location}\n"
+                    f"email: {email}\n"
+                     
+                )
             
             return "User not found" 
         else:
@@ -36,16 +38,11 @@ def load_user_profile(user_id) -> str:
         return f"An unexpected error occurred: {exc}" 
     
 def load_user_uploaded_doc(user_id, user_uploaded_file=None) -> str:
-    DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "data.json"
     try:
-        with open(DATA_PATH, "r") as file:
-            meta_data = json.load(file)
-    
-        for user_info in meta_data:
-            if user_info.get("user_id") == user_id: 
-                file_path = pathlib.Path(__file__).resolve().parents[0] / "uploads"/ user_uploaded_file 
-                
-                return str(file_path)
+        if get_user_repository().get_by_id(user_id) is not None: 
+            file_path = BLOB_STORE.resolve(user_uploaded_file)
+            
+            return str(file_path) if file_path is not None else ""
             
     except FileNotFoundError:   
         return "Data file not found"
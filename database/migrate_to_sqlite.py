@@ -0,0 +1,38 @@
+"""
+One-shot import of database/data.json into the SQLite storage backend.
+
+Usage:
+    python database/migrate_to_sqlite.py [--source data.json] [--target healthcare.db]
+
+Afterwards set HEALTHCARE_STORAGE_BACKEND=sqlite to serve users from SQLite.
+Re-running the migration replaces existing rows for the same user_id.
+"""
+import argparse
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from database.user_repository import DATA_PATH
+from database.sqlite_repository import SqliteUserRepository
+
+
+def migrate(source: pathlib.Path = DATA_PATH, target: pathlib.Path = Config.SQLITE_PATH) -> int:
+    with open(source, "r", encoding="utf-8") as f:
+        users = json.load(f)
+    if not isinstance(users, list):
+        raise ValueError("Corrupted database format (expected list)")
+
+    return SqliteUserRepository(target).import_users(users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import data.json into the SQLite user store.")
+    parser.add_argument("--source", type=pathlib.Path, default=DATA_PATH)
+    parser.add_argument("--target", type=pathlib.Path, default=Config.SQLITE_PATH)
+    args = parser.parse_args()
+
+    imported = migrate(args.source, args.target)
+    print(f"Imported {imported} users from {args.source} into {args.target}")
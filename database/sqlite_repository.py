@@ -0,0 +1,179 @@
+import json
+import pathlib
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    email   TEXT,
+    data    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    data    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_user_id ON schedules(user_id);
+"""
+
+
+class SqliteUserRepository:
+    """
+    SQLite-backed user store with the same interface as JsonUserRepository.
+
+    Users live in ``users`` (one JSON document per row, indexed by user_id and
+    email) and their schedules in ``schedules`` (indexed by user_id), so every
+    mutation touches only the affected rows. The database runs in WAL mode:
+    readers keep working against the last committed snapshot while a writer
+    is active. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    # -------------------------------
+    # CONNECTIONS
+    # -------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _schedules_for(self, conn: sqlite3.Connection, user_id: str) -> list:
+        rows = conn.execute(
+            "SELECT data FROM schedules WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _user_from_row(self, conn: sqlite3.Connection, row) -> Optional[dict]:
+        if row is None:
+            return None
+        user_id, data = row
+        user = json.loads(data)
+        user["schedule"] = self._schedules_for(conn, user_id)
+        return user
+
+    # -------------------------------
+    # READS
+    # -------------------------------
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_by_id(self, user_id: str) -> Optional[dict]:
+        conn = self._connection()
+        row = conn.execute("SELECT user_id, data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return self._user_from_row(conn, row)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT user_id, data FROM users WHERE email = ? LIMIT 1", (email,)
+        ).fetchone()
+        return self._user_from_row(conn, row)
+
+    def email_exists(self, email: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM users WHERE email = ? LIMIT 1", (email,)).fetchone()
+        return row is not None
+
+    def profile_images(self) -> list[str]:
+        rows = self._connection().execute(
+            "SELECT json_extract(data, '$.profile_image') FROM users"
+        ).fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def get_schedules(self, user_id: str) -> Optional[list]:
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is None:
+            return None
+        return self._schedules_for(conn, user_id)
+
+    # -------------------------------
+    # WRITES
+    # -------------------------------
+
+    def _insert_user(self, conn: sqlite3.Connection, user: dict) -> None:
+        record = {key: value for key, value in user.items() if key != "schedule"}
+        conn.execute(
+            "INSERT OR REPLACE INTO users (user_id, email, data) VALUES (?, ?, ?)",
+            (record.get("user_id"), record.get("email"), json.dumps(record)),
+        )
+        conn.execute("DELETE FROM schedules WHERE user_id = ?", (record.get("user_id"),))
+        conn.executemany(
+            "INSERT INTO schedules (user_id, data) VALUES (?, ?)",
+            [(record.get("user_id"), json.dumps(sched)) for sched in user.get("schedule") or []],
+        )
+
+    def add_user(self, user: dict) -> bool:
+        conn = self._connection()
+        with conn:
+            self._insert_user(conn, user)
+        return True
+
+    def import_users(self, users: Iterable[dict]) -> int:
+        """Bulk-load user records (with embedded schedules) in one transaction."""
+        conn = self._connection()
+        count = 0
+        with conn:
+            for user in users:
+                if not user.get("user_id"):
+                    continue
+                self._insert_user(conn, user)
+                count += 1
+        return count
+
+    def update_user_fields(self, user_id: str, fields: dict) -> bool:
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return False
+            record = json.loads(row[0])
+            record.update({key: value for key, value in fields.items() if key != "schedule"})
+            conn.execute(
+                "UPDATE users SET email = ?, data = ? WHERE user_id = ?",
+                (record.get("email"), json.dumps(record), user_id),
+            )
+        return True
+
+    def add_schedule(self, user_id: str, schedule: dict) -> bool:
+        conn = self._connection()
+        with conn:
+            if conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is None:
+                return False
+            conn.execute(
+                "INSERT INTO schedules (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(schedule)),
+            )
+        return True
+
+    def update_schedules(self, user_id: str, new_end_on: Optional[str] = None, new_active: Optional[bool] = None) -> bool:
+        conn = self._connection()
+        with conn:
+            if conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is None:
+                return False
+            rows = conn.execute("SELECT id, data FROM schedules WHERE user_id = ?", (user_id,)).fetchall()
+            updates = []
+            for row_id, data in rows:
+                sched = json.loads(data)
+                if new_end_on is not None:
+                    sched["ends_on"] = new_end_on
+                if new_active is not None:
+                    sched["active"] = new_active
+                updates.append((json.dumps(sched), row_id))
+            conn.executemany("UPDATE schedules SET data = ? WHERE id = ?", updates)
+        return True
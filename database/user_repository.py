@@ -0,0 +1,195 @@
+import copy
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+
+
+DATA_PATH = pathlib.Path(__file__).resolve().parents[0] / "data.json"
+# user ids are generated as 12 random letters/digits at registration
+USER_ID_PATTERN = re.compile(r"[A-Za-z0-9]{12}")
+
+
+def is_valid_user_id(user_id) -> bool:
+    """True if ``user_id`` has the generated form, so it is safe to use in a filename."""
+    return isinstance(user_id, str) and USER_ID_PATTERN.fullmatch(user_id) is not None
+
+
+class JsonUserRepository:
+    """
+    In-memory, indexed view of database/data.json.
+
+    The file is parsed once and kept in memory together with hash indexes on
+    ``user_id`` and ``email``. Every access does a single ``os.stat`` and the
+    store is reloaded only when the file's (mtime, size) stamp changes, so
+    lookups are dictionary hits instead of full-file parses and linear scans.
+
+    Records handed out are copies; use the mutation methods to change data.
+    """
+
+    def __init__(self, path: pathlib.Path = DATA_PATH):
+        self.path = pathlib.Path(path)
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._users: list[dict] = []
+        self._by_id: dict[str, dict] = {}
+        self._by_email: dict[str, dict] = {}
+
+    # -------------------------------
+    # LOADING / INVALIDATION
+    # -------------------------------
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _rebuild_indexes(self) -> None:
+        self._by_id = {}
+        self._by_email = {}
+        for user in self._users:
+            if user.get("user_id") is not None:
+                self._by_id[user["user_id"]] = user
+            if user.get("email") is not None:
+                self._by_email[user["email"]] = user
+
+    def _refresh(self) -> None:
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+
+        if stamp is None:
+            users = []
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                users = json.load(f)
+            if not isinstance(users, list):
+                raise ValueError("Corrupted database format (expected list)")
+
+        self._users = users
+        self._stamp = stamp
+        self._rebuild_indexes()
+
+    def _flush(self) -> None:
+        """Persist the in-memory list atomically and adopt the new file stamp."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._users, f, indent=4)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    # -------------------------------
+    # READS
+    # -------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._users)
+
+    def get_by_id(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            return copy.deepcopy(user) if user is not None else None
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            user = self._by_email.get(email)
+            return copy.deepcopy(user) if user is not None else None
+
+    def email_exists(self, email: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return email in self._by_email
+
+    def profile_images(self) -> list[str]:
+        with self._lock:
+            self._refresh()
+            return [user["profile_image"] for user in self._users if user.get("profile_image")]
+
+    def get_schedules(self, user_id: str) -> Optional[list]:
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            if user is None:
+                return None
+            return copy.deepcopy(user.get("schedule", []))
+
+    # -------------------------------
+    # WRITES
+    # -------------------------------
+
+    def add_user(self, user: dict) -> bool:
+        with self._lock:
+            self._refresh()
+            record = copy.deepcopy(user)
+            self._users.append(record)
+            self._flush()
+            self._rebuild_indexes()
+            return True
+
+    def update_user_fields(self, user_id: str, fields: dict) -> bool:
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            if user is None:
+                return False
+            user.update(copy.deepcopy(fields))
+            self._flush()
+            self._rebuild_indexes()
+            return True
+
+    def add_schedule(self, user_id: str, schedule: dict) -> bool:
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            if user is None:
+                return False
+            if not isinstance(user.get("schedule"), list):
+                user["schedule"] = []
+            user["schedule"].append(copy.deepcopy(schedule))
+            self._flush()
+            return True
+
+    def update_schedules(self, user_id: str, new_end_on: Optional[str] = None, new_active: Optional[bool] = None) -> bool:
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            if user is None:
+                return False
+            for sched in user.get("schedule", []):
+                if new_end_on is not None:
+                    sched["ends_on"] = new_end_on
+                if new_active is not None:
+                    sched["active"] = new_active
+            self._flush()
+            return True
+
+
+_REPOSITORY = None
+_REPOSITORY_LOCK = threading.Lock()
+
+
+def get_user_repository():
+    """Return the process-wide user repository for ``Config.STORAGE_BACKEND``."""
+    global _REPOSITORY
+    if _REPOSITORY is None:
+        with _REPOSITORY_LOCK:
+            if _REPOSITORY is None:
+                if Config.STORAGE_BACKEND == "sqlite":
+                    from database.sqlite_repository import SqliteUserRepository
+                    _REPOSITORY = SqliteUserRepository(Config.SQLITE_PATH)
+                else:
+                    _REPOSITORY = JsonUserRepository()
+    return _REPOSITORY
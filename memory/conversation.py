@@ -1,36 +1,287 @@
-import json, pathlib, os
+import json, pathlib, os, secrets, sys, threading
 from datetime import datetime
 
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.dashboard_stats import DASHBOARD_STATS
+
+
+CONVERSATIONS_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "conversations"
+_UPGRADE_LOCK = threading.Lock()
+
+
+def conversation_path(user_id) -> pathlib.Path:
+    return CONVERSATIONS_DIR / f"{user_id}.jsonl"
+
+
+def legacy_conversation_path(user_id) -> pathlib.Path:
+    return CONVERSATIONS_DIR / f"{user_id}.json"
+
+
+def _is_header(entry) -> bool:
+    return isinstance(entry, dict) and set(entry) == {"log"}
+
+
+def _create_log(path: pathlib.Path, entries: list[dict] = ()) -> None:
+    """
+    Atomically create the log at ``path`` with a header carrying a random log
+    id, unless it already exists. Cursors carry this id rather than the inode,
+    which the filesystem hands out again as soon as a deleted log is recreated.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"log": secrets.token_hex(8)}) + "\n")
+        for item in entries:
+            f.write(json.dumps(item) + "\n")
+    try:
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+
+
+def _upgrade_legacy_file(user_id) -> None:
+    """Convert a pre-JSONL ``<user_id>.json`` array into the append-only log, once."""
+    legacy = legacy_conversation_path(user_id)
+    if not legacy.exists():
+        return
+
+    with _UPGRADE_LOCK:
+        if not legacy.exists():
+            return
+        target = conversation_path(user_id)
+        if not target.exists():
+            try:
+                with open(legacy, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                data = []
+            if not isinstance(data, list):
+                data = []
+            _create_log(target, data)
+        os.remove(legacy)
+
+
+def conversation_user_ids() -> list[str]:
+    if not CONVERSATIONS_DIR.exists():
+        return []
+    return sorted({path.stem for pattern in ("*.jsonl", "*.json") for path in CONVERSATIONS_DIR.glob(pattern)})
+
+
+def read_conversation_entries(user_id) -> list[dict]:
+    """Return every logged message for ``user_id``, oldest first."""
+    _upgrade_legacy_file(user_id)
+    path = conversation_path(user_id)
+    if not path.exists():
+        return []
+
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # torn trailing write from a crash; the rest of the log is intact
+                continue
+            if not _is_header(entry):
+                entries.append(entry)
+    return entries
+
+
+def _read_header(f) -> tuple[str, int]:
+    """The log id and the offset of the first message (``"0"``, 0 for logs written before log ids)."""
+    f.seek(0)
+    line = f.readline()
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return "0", 0
+    if not line.endswith(b"\n") or not _is_header(entry):
+        return "0", 0
+    return str(entry["log"]), len(line)
+
+
+def encode_cursor(log_id: str, offset: int) -> str:
+    return f"{log_id}-{offset:x}"
+
+
+def decode_cursor(cursor, log_id: str):
+    """Byte offset from ``cursor``, or None if it is malformed or from an older (deleted) log."""
+    cursor_log_id, _, offset = str(cursor).partition("-")
+    try:
+        offset = int(offset, 16)
+    except ValueError:
+        return None
+    return offset if cursor_log_id == log_id and offset >= 0 else None
+
+
+def _parse_lines(data: bytes) -> list[dict]:
+    entries = []
+    for line in data.split(b"\n"):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not _is_header(entry):
+            entries.append(entry)
+    return entries
+
+
+def _lines_before(f, end: int, limit: int, floor: int = 0, block_size: int = 64 * 1024) -> tuple[int, bytes]:
+    """Start offset and bytes of the last ``limit`` complete lines between ``floor`` and ``end``."""
+    start = end
+    data = b""
+    while start > floor and data.count(b"\n") <= limit:
+        step = min(block_size, start - floor)
+        start -= step
+        f.seek(start)
+        data = f.read(step) + data
+    if data.count(b"\n") > limit:
+        # drop the partial/extra lines in front of the last ``limit`` lines
+        cut = len(data)
+        for _ in range(limit + 1):
+            cut = data.rindex(b"\n", 0, cut)
+        start += cut + 1
+        data = data[cut + 1:]
+    return start, data
+
+
+def read_conversation_page(user_id, before=None, since=None, limit: int = 50) -> dict:
+    """
+    One page of the user's log, addressed by byte-offset cursors, so a page
+    costs the bytes it returns rather than a read of the whole history.
+
+    - no cursor: the newest ``limit`` messages
+    - ``before``: the ``limit`` messages preceding that cursor (scrolling up)
+    - ``since``: up to ``limit`` messages appended after that cursor (reconnect)
+
+    The result has ``messages`` (oldest first), ``before`` (cursor for the
+    next older page, None at the start), ``cursor`` (pass back as ``since``),
+    ``has_more`` (more new messages after ``cursor``) and ``reset``. ``reset``
+    is True when a cursor referred to a log that no longer exists (its log id
+    differs), and the page then starts over.
+    """
+    _upgrade_legacy_file(user_id)
+    path = conversation_path(user_id)
+    page = {"messages": [], "before": None, "cursor": None, "has_more": False, "reset": False}
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        page["reset"] = before is not None or since is not None
+        return page
+
+    with f:
+        log_id, first = _read_header(f)
+        # ignore a trailing line that is still being written
+        size = os.fstat(f.fileno()).st_size
+        if size > first:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                size = _lines_before(f, size, 0, first)[0]
+
+        if since is not None:
+            offset = decode_cursor(since, log_id)
+            if offset is None or offset > size:
+                page["reset"], offset = True, first
+            offset = max(offset, first)
+            f.seek(offset)
+            data = f.read(size - offset)
+            lines = data.split(b"\n")[:-1]
+            taken = lines[:limit]
+            end = offset + sum(len(line) + 1 for line in taken)
+            page["messages"] = _parse_lines(b"\n".join(taken))
+            page["before"] = encode_cursor(log_id, offset) if offset > first else None
+            page["cursor"] = encode_cursor(log_id, end)
+            page["has_more"] = end < size
+            return page
+
+        end = size
+        if before is not None:
+            end = decode_cursor(before, log_id)
+            if end is None or end > size:
+                page["reset"], end = True, size
+        start, data = _lines_before(f, max(end, first), limit, first)
+        page["messages"] = _parse_lines(data)
+        page["before"] = encode_cursor(log_id, start) if start > first else None
+        page["cursor"] = encode_cursor(log_id, size)
+        return page
+
+
+def _ends_torn(fd: int) -> bool:
+    """True if the log doesn't end in a newline (a crash interrupted the last append)."""
+    size = os.fstat(fd).st_size
+    return size > 0 and os.pread(fd, 1, size - 1) != b"\n"
+
+
+def append_conversation_entries(user_id, entries: list[dict]) -> None:
+    """Append ``entries`` to the user's log, normally with a single ``os.write``."""
+    _upgrade_legacy_file(user_id)
+    os.makedirs(CONVERSATIONS_DIR, exist_ok=True)
+    payload = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+
+    path = conversation_path(user_id)
+    while True:
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND)
+            break
+        except FileNotFoundError:
+            _create_log(path)
+    try:
+        if _ends_torn(fd):
+            # terminate the torn line so it is skipped instead of swallowing these entries
+            payload = b"\n" + payload
+        view = memoryview(payload)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        if Config.CONVERSATION_FSYNC == "always":
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    try:
+        DASHBOARD_STATS.record_messages(user_id, entries)
+    except Exception as e:
+        # the messages are logged; stale dashboard numbers must not fail the chat turn
+        print(f"Could not update dashboard stats of {user_id}: {e}")
+
+
+def delete_conversation_log(user_id) -> bool:
+    deleted = False
+    for path in (conversation_path(user_id), legacy_conversation_path(user_id)):
+        if path.exists():
+            os.remove(path)
+            deleted = True
+    return deleted
+
+
+def _conversation_entry(role, content, created_report: str = None, uploaded_file=None) -> dict:
+    return {"role": role, "content": content, "time": datetime.now().isoformat(), "created_report": created_report, "uploaded_file": uploaded_file}
+
 
 def load_conversation(user_id) -> str:
-    FILE_PATH = pathlib.Path(__file__).resolve().parents[1] / "database" / "conversations" / f"{user_id}.json"
-    
-    CONVERSATION = """no conversation started yet."""
-    if os.path.exists(FILE_PATH):
-        with open(FILE_PATH, 'r') as f:
-            data = json.load(f) 
-        if isinstance(data, list):
-            if len(data) < 1:
-               return CONVERSATION
-            else:
-                for item in data:
-                    CONVERSATION += f"\n---------\n role:{item['role']}\n content:{item['content']}\n time:{item['time']}"
-                return CONVERSATION 
-    else:
-        with open(FILE_PATH, 'w') as f:
-            json.dump([], f) 
-        return CONVERSATION 
-    
+    return format_conversation(read_conversation_entries(user_id))
+
+def format_entry(item: dict) -> str:
+    return f"\n---------\n role:{item['role']}\n content:{item['content']}\n time:{item['time']}"
+
+def format_conversation(data: list[dict], empty: str = "no conversation started yet.") -> str:
+    if len(data) < 1:
+        return empty
+    return empty + "".join(format_entry(item) for item in data)
+
 def write_conversations(user_id, role, content, created_report: str = None , uploaded_file=None) -> str:
-    FILE_PATH = pathlib.Path(__file__).resolve().parents[1] / "database" / "conversations" / f"{user_id}.json"
-    CONVERSATION = {"role": role, "content": content, "time": datetime.now().isoformat(), "created_report": created_report, "uploaded_file": uploaded_file} 
-    if not os.path.exists(FILE_PATH):
-        with open(FILE_PATH, 'w') as f:
-            json.dump([], f)
-
-    with open(FILE_PATH, 'r') as f: 
-        json_data = json.load(f) 
-        json_data.append(CONVERSATION)
-        
-        with open(FILE_PATH, 'w') as f:
-            json.dump(json_data, f ,indent=4)
\ No newline at end of file
+    append_conversation_entries(user_id, [_conversation_entry(role, content, created_report, uploaded_file)])
+
+def write_conversation_turn(user_id, user_input, ai_output, uploaded_file=None) -> None:
+    """Persist a user message and the AI reply as one append."""
+    append_conversation_entries(user_id, [
+        _conversation_entry("user", user_input, uploaded_file=uploaded_file),
+        _conversation_entry("ai", ai_output),
+    ])
@@ -0,0 +1,201 @@
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+from typing import Callable
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from memory.conversation import CONVERSATIONS_DIR, format_conversation, format_entry
+
+
+SUMMARIES_DIR = CONVERSATIONS_DIR / "summaries"
+TRUNCATION_MARK = " ...[truncated]"
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+# -------------------------------
+# TOKEN COUNTING
+# -------------------------------
+
+def estimate_tokens(text: str) -> int:
+    """Fast tokenizer-free estimate (about 4 characters or 0.75 words per token)."""
+    return max(len(text) // 4, int(len(text.split()) * 1.3))
+
+
+_ENCODING = None
+
+
+def tiktoken_tokens(text: str) -> int:
+    global _ENCODING
+    if _ENCODING is None:
+        import tiktoken
+        _ENCODING = tiktoken.get_encoding("cl100k_base")
+    return len(_ENCODING.encode(text, disallowed_special=()))
+
+
+def token_counter(name: str) -> Callable[[str], int]:
+    return tiktoken_tokens if name == "tiktoken" else estimate_tokens
+
+
+# -------------------------------
+# SUMMARIZERS
+# -------------------------------
+
+def _first_sentence(text: str, max_chars: int = 160) -> str:
+    text = " ".join(str(text).split())
+    sentence = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars - 3].rstrip() + "..."
+
+
+def local_summarizer(summary: str, entries: list[dict], budget: int, count: Callable[[str], int]) -> str:
+    """
+    Deterministic stand-in for an LLM summary: one line per folded turn with
+    the first sentence of what the user asked and what was answered. The
+    oldest lines are dropped once the summary would exceed ``budget``.
+    """
+    lines = [line for line in summary.splitlines() if line]
+    for item in entries:
+        speaker = "user" if item.get("role") == "user" else "assistant"
+        lines.append(f"- {speaker}: {_first_sentence(item.get('content', ''))}")
+    while lines and count("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def llm_summarizer(summary: str, entries: list[dict], budget: int, count: Callable[[str], int]) -> str:
+    from model.llm import llm
+
+    words = max(50, int(budget * 0.7))
+    prompt = (
+        "You maintain a running summary of a patient's conversation with a healthcare assistant.\n"
+        f"Update the summary with the new messages. Keep symptoms, conditions, medications, "
+        f"reports and open questions; drop pleasantries. At most {words} words.\n\n"
+        f"CURRENT SUMMARY:\n{summary or '(empty)'}\n\nNEW MESSAGES:{format_conversation(entries, empty='')}"
+    )
+    response = llm(temperature=0).invoke(prompt)
+    text = str(getattr(response, "content", response)).strip()
+    # never let a long model reply break the budget
+    return local_summarizer("", [{"role": "ai", "content": text}], budget, count) if count(text) > budget else text
+
+
+SUMMARIZERS = {"local": local_summarizer, "llm": llm_summarizer}
+
+
+# -------------------------------
+# WINDOW
+# -------------------------------
+
+class HistoryWindow:
+    """
+    Bounded conversation history for prompts.
+
+    The last ``keep_turns`` turns are kept verbatim, dropping the oldest of
+    them if they alone exceed ``budget_tokens``. Everything older is folded
+    into a rolling summary of at most ``summary_tokens``. The summary is
+    persisted per user with the number of log entries it covers. Each turn
+    only folds the entries that have left the window since then, so the
+    summarizer never re-reads the whole log. The newest message is always
+    kept, cut down to ``budget_tokens`` if it alone is larger, so the prompt
+    stays within ``budget_tokens + summary_tokens`` however long the account
+    history or any single message is. Summaries are updated under a per-user
+    lock, so a slow (LLM) summary only holds up that user.
+    """
+
+    def __init__(self, budget_tokens: int = 2000, keep_turns: int = 6, summary_tokens: int = 400,
+                 summarizer: str = "local", tokenizer: str = "estimate", directory: pathlib.Path = SUMMARIES_DIR):
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.summarize = SUMMARIZERS.get(summarizer, local_summarizer)
+        self.count = token_counter(tokenizer)
+        self.directory = pathlib.Path(directory)
+        self._lock = threading.Lock()
+        self._user_locks: dict[str, threading.Lock] = {}
+
+    def _user_lock(self, user_id) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    def summary_path(self, user_id) -> pathlib.Path:
+        return self.directory / f"{user_id}.json"
+
+    def _load_summary(self, user_id) -> dict:
+        try:
+            with open(self.summary_path(user_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"covered": 0, "summary": ""}
+
+    def _save_summary(self, user_id, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.summary_path(user_id)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, user_id) -> None:
+        try:
+            os.remove(self.summary_path(user_id))
+        except FileNotFoundError:
+            pass
+
+    def split(self, entries: list[dict]) -> int:
+        """Index of the first entry kept verbatim."""
+        start = max(0, len(entries) - 2 * self.keep_turns)
+        used = sum(self.count(format_entry(item)) for item in entries[start:])
+        while start < len(entries) - 1 and used > self.budget_tokens:
+            used -= self.count(format_entry(entries[start]))
+            start += 1
+        return start
+
+    def fit(self, item: dict) -> dict:
+        """``item`` with its content cut so the formatted entry fits ``budget_tokens``."""
+        if self.count(format_entry(item)) <= self.budget_tokens:
+            return item
+        content = str(item.get("content", ""))
+        keep = min(len(content), self.budget_tokens * 4)
+        while keep > 0 and self.count(format_entry({**item, "content": content[:keep] + TRUNCATION_MARK})) > self.budget_tokens:
+            keep = keep * 3 // 4
+        return {**item, "content": content[:keep] + TRUNCATION_MARK}
+
+    def rolling_summary(self, user_id, entries: list[dict], split: int) -> tuple[str, int]:
+        """(summary of entries[:split'], split') where split' >= split never un-summarizes entries."""
+        with self._user_lock(user_id):
+            state = self._load_summary(user_id)
+            covered = state.get("covered", 0)
+            summary = state.get("summary", "")
+            if covered > len(entries):
+                # the log was cleared or rewritten; start over
+                covered, summary = 0, ""
+            if covered < split:
+                summary = self.summarize(summary, entries[covered:split], self.summary_tokens, self.count)
+                self._save_summary(user_id, {"covered": split, "summary": summary})
+                covered = split
+            return summary, covered
+
+    def build(self, user_id, entries: list[dict]) -> str:
+        summary, split = self.rolling_summary(user_id, entries, self.split(entries))
+        kept = entries[split:]
+        if len(kept) == 1:
+            # split() never drops the newest message, however large it is
+            kept = [self.fit(kept[0])]
+        if not summary:
+            return format_conversation(kept)
+        return f"summary of {split} earlier messages:\n{summary}" + format_conversation(kept, empty="")
+
+
+HISTORY_WINDOW = HistoryWindow(
+    budget_tokens=Config.HISTORY_TOKEN_BUDGET,
+    keep_turns=Config.HISTORY_KEEP_TURNS,
+    summary_tokens=Config.HISTORY_SUMMARY_TOKENS,
+    summarizer=Config.HISTORY_SUMMARIZER,
+    tokenizer=Config.HISTORY_TOKENIZER,
+)
@@ -1,16 +1,64 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 import os
 import dotenv
-import pathlib 
-
-
-def llm() -> ChatGoogleGenerativeAI:
- 
-    dotenv.load_dotenv(dotenv_path=str(pathlib.Path(__file__).resolve().parents[1] / "utilities" / "secret" / ".env"))
-    
-    
-    return ChatGoogleGenerativeAI(
-        api_key=str(os.getenv("GEMINI_API_KEY")).strip(),
-        model=str(os.getenv("GEMINI_MODEL", "gemini-2.5-flash")).strip(),
-        verbose=True, 
-    )
\ No newline at end of file
+import pathlib
+import threading
+from typing import Callable
+
+
+ENV_PATH = pathlib.Path(__file__).resolve().parents[1] / "utilities" / "secret" / ".env"
+
+# One configured client per (settings) tuple for the whole process, so the
+# underlying HTTP connection pool is reused instead of rebuilt on every call.
+_CLIENTS: dict[tuple, ChatGoogleGenerativeAI] = {}
+_CLIENTS_LOCK = threading.Lock()
+_RELOAD_HOOKS: list[Callable[[], None]] = []
+_ENV_LOADED = False
+
+
+def _load_env(override: bool = False) -> None:
+    global _ENV_LOADED
+    dotenv.load_dotenv(dotenv_path=str(ENV_PATH), override=override)
+    _ENV_LOADED = True
+
+
+def llm(**overrides) -> ChatGoogleGenerativeAI:
+    """
+    Return the shared Gemini client for the current settings.
+
+    Keyword arguments override the defaults (e.g. ``temperature=0``) and get
+    their own cached client.
+    """
+    if not _ENV_LOADED:
+        _load_env()
+
+    settings = {
+        "api_key": str(os.getenv("GEMINI_API_KEY")).strip(),
+        "model": str(os.getenv("GEMINI_MODEL", "gemini-2.5-flash")).strip(),
+        "verbose": True,
+        **overrides,
+    }
+    key = tuple(sorted((name, repr(value)) for name, value in settings.items()))
+
+    client = _CLIENTS.get(key)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                client = ChatGoogleGenerativeAI(**settings)
+                _CLIENTS[key] = client
+    return client
+
+
+def register_reload_hook(hook: Callable[[], None]) -> None:
+    """Call ``hook`` after ``reload_llm`` so dependants can rebuild from fresh clients."""
+    _RELOAD_HOOKS.append(hook)
+
+
+def reload_llm() -> None:
+    """Re-read the .env file, drop cached clients and rebuild everything built on them."""
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+    _load_env(override=True)
+    for hook in list(_RELOAD_HOOKS):
+        hook()
@@ -0,0 +1,118 @@
+import fcntl
+import json
+import os
+import pathlib
+import threading
+from datetime import datetime, timedelta
+
+
+LEDGER_PATH = pathlib.Path(__file__).resolve().parents[1] / "database" / "reminder_ledger.jsonl"
+
+
+class DeliveryLedger:
+    """
+    Persisted record of delivered reminder occurrences.
+
+    Each delivery is stored as (user_id, schedule id, occurrence time) in an
+    append-only JSONL file and mirrored in an in-memory set. ``claim`` records
+    an occurrence and returns False if it was already delivered, so each
+    occurrence is sent at most once, including across restarts.
+
+    Claims take an exclusive ``flock`` on the file and first read whatever
+    other workers appended since the last claim, so several processes can
+    share one ledger. Entries older than ``retention`` are compacted away
+    when the ledger is first loaded.
+    """
+
+    def __init__(self, path: pathlib.Path = LEDGER_PATH, retention: timedelta = timedelta(days=14)):
+        self.path = pathlib.Path(path)
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._delivered: set[tuple[str, str, str]] = set()
+        self._inode = None
+        self._offset = 0
+        self._compacted = False
+
+    @staticmethod
+    def _key(item: dict) -> tuple[str, str, str]:
+        return (item["user_id"], item["schedule_id"], item["occurrence"])
+
+    def _compact(self, f) -> None:
+        cutoff = (datetime.now() - self.retention).isoformat()
+        f.seek(0)
+        kept = []
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if item.get("occurrence", "") >= cutoff:
+                kept.append(item)
+
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for item in kept:
+                tmp.write(json.dumps(item) + "\n")
+        os.replace(tmp_path, self.path)
+        self._compacted = True
+
+    def _sync(self, f) -> None:
+        """Read entries appended (by any process) since the last sync."""
+        inode = os.fstat(f.fileno()).st_ino
+        if inode != self._inode:
+            # first load, or another worker compacted the file
+            self._inode = inode
+            self._offset = 0
+            self._delivered = set()
+
+        f.seek(self._offset)
+        while True:
+            line = f.readline()
+            if not line.endswith("\n"):
+                # end of file, or a line another worker is still writing
+                break
+            self._offset = f.tell()
+            try:
+                self._delivered.add(self._key(json.loads(line)))
+            except (json.JSONDecodeError, KeyError):
+                continue
+
+    def _open_locked(self):
+        os.makedirs(self.path.parent, exist_ok=True)
+        while True:
+            f = open(self.path, "a+", encoding="utf-8")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(f.fileno()).st_ino:
+                break
+            # another worker compacted (replaced) the file while we waited for the lock
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+        if not self._compacted:
+            self._compact(f)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+            return self._open_locked()
+        return f
+
+    def claim(self, user_id: str, schedule_id: str, occurrence: datetime) -> bool:
+        """Record the occurrence as delivered; False if it already was."""
+        key = (user_id, schedule_id, occurrence.isoformat())
+        with self._lock:
+            with self._open_locked() as f:
+                self._sync(f)
+                if key in self._delivered:
+                    return False
+                f.seek(0, os.SEEK_END)
+                f.write(json.dumps({"user_id": key[0], "schedule_id": key[1], "occurrence": key[2]}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+                self._delivered.add(key)
+            return True
+
+
+DELIVERY_LEDGER = DeliveryLedger()
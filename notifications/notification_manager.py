@@ -2,6 +2,16 @@ from datetime import datetime
 import pathlib,sys,os ,json
 from typing import Optional
 
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.dashboard_stats import DASHBOARD_STATS
+from database.user_repository import get_user_repository
+from notifications.reminder_scheduler import (
+    REMINDER_SCHEDULER,
+    parse_ends_on,
+    parse_reminder_time,
+    schedule_calendar,
+    schedule_title,
+)
 
 
 
@@ -9,45 +19,18 @@ from typing import Optional
 
 
 def get_user_schedule(user_id: str) -> list:
-    try:
-        FILE_DIR  = pathlib.Path(__file__).resolve().parents[1] / "database" / "data.json"
-        with open(FILE_DIR, "r") as f:
-            users = json.load(f)
- 
-        for user in users:
-            if user.get("user_id") == user_id:
-                return user.get("schedule")
-
-        return []
-
-    except FileNotFoundError:
-        print("Error: JSON file not found.")
-        return [] 
+    schedules = get_user_repository().get_schedules(user_id)
+    return schedules if schedules is not None else []
     
 
 
 def normalize_time(timestr):
-    if not timestr:
-        return None
-    timestr = timestr.replace(" ", "").lower()
-    return datetime.strptime(timestr, "%I:%M%p").time()
+    return parse_reminder_time(timestr)
 
 
 def check_user_reminders(user_id: str):
  
-    try:
-        FILE_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "data.json"
-        with open(FILE_DIR, "r") as f:
-            users = json.load(f)
-    except FileNotFoundError:
-        print("Error: JSON file not found.")
-        return False, None
-
-    user = next((u for u in users if u.get("user_id") == user_id), None)
-    if not user:
-        return False, None
-
-    schedules = user.get("schedule", [])
+    schedules = get_user_repository().get_schedules(user_id)
     if not schedules:
         return False, None
 
@@ -59,16 +42,11 @@ def check_user_reminders(user_id: str):
         if not sched.get("active", False):
             continue
 
-        ends_on_str = sched.get("ends_on")
-        if ends_on_str:
-            try:
-                ends_on_date = datetime.strptime(ends_on_str, "%a/%d/%Y").date()
-                if now.date() > ends_on_date:
-                    continue
-            except ValueError:
-                pass
+        ends_on_date = parse_ends_on(sched.get("ends_on"))
+        if ends_on_date and now.date() > ends_on_date:
+            continue
 
-        for item in sched.get("calender_data", []):
+        for item in schedule_calendar(sched):
             if not item.get("remind_me"):
                 continue
 
@@ -77,7 +55,7 @@ def check_user_reminders(user_id: str):
 
             if sched_day == current_day and sched_time_obj == current_time_obj:
                
-                return True, sched.get("shedule_title", "Reminder!")
+                return True, schedule_title(sched)
 
     return False, None
 
@@ -86,64 +64,20 @@ def check_user_reminders(user_id: str):
 
 
 def update_user_schedule(user_id: str, new_end_on: Optional[str] = None, new_active: Optional[bool] = None) -> bool:
- 
-    try:
-        FILE_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "data.json"
-        with open(FILE_DIR, "r") as f:
-            users = json.load(f)
-    except FileNotFoundError:
-        print("JSON file not found.")
-        return False
-    
-    user_found = False
-    for user in users:
-        if user.get("user_id") == user_id:
-            user_found = True
-            for sched in user.get("schedule", []):
-                if new_end_on is not None:
-                    sched["ends_on"] = new_end_on
-                if new_active is not None:
-                    sched["active"] = new_active
-            break
-    
-    if not user_found:
-        return False
-   
-    with open(FILE_DIR, "w") as f:
-        json.dump(users, f, indent=4)
-    
-    return True
+    updated = get_user_repository().update_schedules(user_id, new_end_on, new_active)
+    if updated:
+        REMINDER_SCHEDULER.refresh_user(user_id)
+    return updated
 
  
 
 def add_user_schedule(user_id: str, new_schedule: dict) -> bool:
-  
-    try:
-        FILE_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "data.json"
-        with open(FILE_DIR, "r") as f:
-            users = json.load(f)
-    except FileNotFoundError:
-        print("JSON file not found.")
-        return False
-
-    user_found = False
-    for user in users:
-        if user.get("user_id") == user_id:
-            user_found = True
-            if "schedule" not in user or not isinstance(user["schedule"], list):
-                user["schedule"] = []
-            user["schedule"].append(new_schedule)
-            
-            break
-
-    if not user_found:
-        return False
-
-
-    with open(FILE_DIR, "w") as f:
-        json.dump(users, f, indent=4)
-
-    return True
+    repository = get_user_repository()
+    added = repository.add_schedule(user_id, new_schedule)
+    if added:
+        REMINDER_SCHEDULER.refresh_user(user_id)
+        DASHBOARD_STATS.set_schedule_count(user_id, len(repository.get_schedules(user_id) or []))
+    return added
 
     
 v = {
@@ -0,0 +1,248 @@
+import heapq
+import itertools
+import pathlib
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.user_repository import get_user_repository
+
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def parse_reminder_time(timestr):
+    if not timestr:
+        return None
+    timestr = timestr.replace(" ", "").lower()
+    return datetime.strptime(timestr, "%I:%M%p").time()
+
+
+def parse_ends_on(ends_on_str):
+    if not ends_on_str:
+        return None
+    try:
+        return datetime.strptime(ends_on_str, "%a/%d/%Y").date()
+    except ValueError:
+        return None
+
+
+def schedule_title(sched: dict) -> str:
+    return sched.get("schedule_title") or sched.get("shedule_title") or "Reminder!"
+
+
+def schedule_key(sched: dict, index: int) -> str:
+    """Stable id of a schedule: its ``_id`` when set, else its position."""
+    return str(sched.get("_id", f"index:{index}"))
+
+
+def schedule_calendar(sched: dict) -> list:
+    # the UI sends "calendar_data"; older records use "calender_data"
+    return sched.get("calendar_data") or sched.get("calender_data") or []
+
+
+def next_occurrence(day: str, time_of_day, after: datetime) -> Optional[datetime]:
+    """First datetime strictly after ``after`` on weekday ``day`` at ``time_of_day``."""
+    day = (day or "").lower()
+    if day not in WEEKDAYS or time_of_day is None:
+        return None
+    days_ahead = (WEEKDAYS.index(day) - after.weekday()) % 7
+    candidate = datetime.combine(after.date() + timedelta(days=days_ahead), time_of_day)
+    if candidate <= after:
+        candidate += timedelta(days=7)
+    return candidate
+
+
+def schedule_occurrences(sched: dict, after: datetime, until: Optional[datetime] = None) -> list[datetime]:
+    """
+    Fire times of every remind_me slot of an active schedule after ``after``.
+
+    Without ``until`` only the next fire time of each slot is returned; with
+    it, every weekly occurrence up to and including ``until``.
+    """
+    if not sched.get("active", False):
+        return []
+    ends_on = parse_ends_on(sched.get("ends_on"))
+
+    fire_times = []
+    for item in schedule_calendar(sched):
+        if not item.get("remind_me"):
+            continue
+        try:
+            time_of_day = parse_reminder_time(item.get("time"))
+        except ValueError:
+            continue
+        fire_at = next_occurrence(item.get("day"), time_of_day, after)
+        while fire_at is not None and (ends_on is None or fire_at.date() <= ends_on):
+            if until is not None and fire_at > until:
+                break
+            fire_times.append(fire_at)
+            if until is None:
+                break
+            fire_at += timedelta(days=7)
+    return sorted(fire_times)
+
+
+class ReminderScheduler:
+    """
+    Heap of precomputed reminder fire times for watched (connected) users.
+
+    ``run`` sleeps until the earliest entry is due instead of polling, so
+    idle cost does not grow with the number of users. Schedules are parsed
+    only when a user is watched or ``refresh_user`` is called after a
+    schedule changes. Stale heap entries are skipped lazily using a
+    per-user generation. Generations come from one process-wide counter,
+    so entries from before an unwatch never match a later watch. The heap
+    is compacted once stale entries outnumber live ones.
+    """
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now):
+        self.clock = clock
+        self._heap: list = []
+        self._generation: dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._generations = itertools.count(1)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self.shared = None
+        self.shared_poll_seconds = 2.0
+
+    def use_shared_state(self, shared, poll_seconds: float = 2.0) -> None:
+        """
+        Multi-worker mode: watch/unwatch/refresh calls are recorded in
+        ``shared`` (a SharedReminderState) and applied by whichever worker
+        runs ``run``, which polls it every ``poll_seconds``.
+        """
+        self.shared = shared
+        self.shared_poll_seconds = poll_seconds
+
+    # -------------------------------
+    # USERS
+    # -------------------------------
+
+    def watch(self, user_id: str) -> None:
+        if self.shared is not None:
+            self.shared.mark_online(user_id)
+            return
+        self._load_user(user_id)
+
+    def unwatch(self, user_id: str) -> None:
+        if self.shared is not None:
+            self.shared.mark_offline(user_id)
+            return
+        self._forget_user(user_id)
+
+    def refresh_user(self, user_id: str) -> None:
+        """Recompute the user's fire times after a schedule change (no-op if not watched)."""
+        if self.shared is not None:
+            self.shared.mark_dirty(user_id)
+            return
+        if user_id in self._generation:
+            self._load_user(user_id)
+
+    def is_watched(self, user_id: str) -> bool:
+        with self._condition:
+            return user_id in self._generation
+
+    def _forget_user(self, user_id: str) -> None:
+        with self._condition:
+            if self._generation.pop(user_id, None) is None:
+                return
+            live = [entry for entry in self._heap if self._generation.get(entry[2]) == entry[3]]
+            if len(live) * 2 < len(self._heap):
+                heapq.heapify(live)
+                self._heap = live
+
+    def _load_user(self, user_id: str) -> None:
+        schedules = get_user_repository().get_schedules(user_id) or []
+        now = self.clock()
+
+        with self._condition:
+            generation = next(self._generations)
+            self._generation[user_id] = generation
+            for index, sched in enumerate(schedules):
+                for fire_at in schedule_occurrences(sched, now):
+                    self._push(fire_at, user_id, generation, index, sched)
+            self._condition.notify()
+
+    def _sync_shared(self) -> None:
+        online, dirty = self.shared.poll()
+        with self._condition:
+            watched = set(self._generation)
+        if online is not None:
+            for user_id in online - watched:
+                self._load_user(user_id)
+            for user_id in watched - online:
+                self._forget_user(user_id)
+            watched = online
+        for user_id in dirty:
+            if user_id in watched:
+                self._load_user(user_id)
+
+    def missed_occurrences(self, user_id: str, since: datetime, until: Optional[datetime] = None) -> list[tuple[datetime, str, dict]]:
+        """(fire_at, schedule id, schedule) of every occurrence in (since, until]."""
+        until = until or self.clock()
+        schedules = get_user_repository().get_schedules(user_id) or []
+        missed = [
+            (fire_at, schedule_key(sched, index), sched)
+            for index, sched in enumerate(schedules)
+            for fire_at in schedule_occurrences(sched, since, until)
+        ]
+        return sorted(missed, key=lambda item: item[0])
+
+    def _push(self, fire_at: datetime, user_id: str, generation: int, index: int, sched: dict) -> None:
+        heapq.heappush(self._heap, (fire_at, next(self._sequence), user_id, generation, index, sched))
+
+    # -------------------------------
+    # LOOP
+    # -------------------------------
+
+    def pop_due(self) -> list[tuple[str, datetime, str, dict]]:
+        """Remove and return every (user_id, fire_at, schedule id, schedule) that is due now."""
+        due = []
+        now = self.clock()
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, _, user_id, generation, index, sched = heapq.heappop(self._heap)
+                if self._generation.get(user_id) != generation:
+                    continue
+                due.append((user_id, fire_at, schedule_key(sched, index), sched))
+                # re-arm the same slot for next week
+                weekly = fire_at + timedelta(days=7)
+                ends_on = parse_ends_on(sched.get("ends_on"))
+                if ends_on is None or weekly.date() <= ends_on:
+                    self._push(weekly, user_id, generation, index, sched)
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        with self._condition:
+            if not self._heap:
+                return None
+            return max(0.0, (self._heap[0][0] - self.clock()).total_seconds())
+
+    def run(self, on_due: Callable[[str, datetime, str, dict], None]) -> None:
+        """Block, calling ``on_due(user_id, fire_at, schedule_id, schedule)`` as reminders come due."""
+        while not self._stopped:
+            if self.shared is not None:
+                self._sync_shared()
+
+            for user_id, fire_at, schedule_id, sched in self.pop_due():
+                on_due(user_id, fire_at, schedule_id, sched)
+
+            with self._condition:
+                if self._stopped:
+                    break
+                # wake at least once a minute so wall-clock jumps are noticed
+                longest = self.shared_poll_seconds if self.shared is not None else 60.0
+                timeout = self.seconds_until_next()
+                self._condition.wait(timeout=min(timeout, longest) if timeout is not None else longest)
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+
+REMINDER_SCHEDULER = ReminderScheduler()
@@ -0,0 +1,107 @@
+import os
+import pathlib
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from database.user_repository import is_valid_user_id
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedReminderState:
+    """
+    Cross-worker view of which users are online and whose schedules changed.
+
+    Used when several workers serve Socket.IO and only the elected leader
+    runs the reminder scheduler. A worker marks a user online while it holds
+    at least one of their sockets, as ``online/<user_id>.<pid>``, so a user
+    with tabs on two workers stays online until both have closed. Schedule
+    edits are flagged with one file per user in ``dirty/``. The leader calls
+    ``poll``. It re-lists ``online/`` when the directory's mtime changes
+    (and every ``relist_seconds``, to drop markers of workers that died),
+    and it consumes the dirty flags.
+    """
+
+    def __init__(self, root: pathlib.Path, relist_seconds: float = 60.0):
+        self.online_dir = pathlib.Path(root) / "online"
+        self.dirty_dir = pathlib.Path(root) / "dirty"
+        self.online_dir.mkdir(parents=True, exist_ok=True)
+        self.dirty_dir.mkdir(parents=True, exist_ok=True)
+        self.relist_seconds = relist_seconds
+        self._online_stamp = None
+        self._listed_at = 0.0
+
+    @staticmethod
+    def _check(user_id: str) -> str:
+        # the id names a file; never let client input escape the directory
+        if not is_valid_user_id(user_id):
+            raise ValueError(f"Invalid user_id: {user_id!r}")
+        return user_id
+
+    @staticmethod
+    def _touch(path: pathlib.Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+
+    @staticmethod
+    def _remove(path: pathlib.Path) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _marker(self, user_id: str) -> pathlib.Path:
+        return self.online_dir / f"{self._check(user_id)}.{os.getpid()}"
+
+    def mark_online(self, user_id: str) -> None:
+        self._touch(self._marker(user_id))
+
+    def mark_offline(self, user_id: str) -> None:
+        """This worker holds no more sockets of ``user_id``."""
+        self._remove(self._marker(user_id))
+
+    def mark_dirty(self, user_id: str) -> None:
+        self._touch(self.dirty_dir / self._check(user_id))
+
+    def _online_users(self) -> set[str]:
+        online = set()
+        for name in os.listdir(self.online_dir):
+            user_id, _, pid = name.partition(".")
+            if not is_valid_user_id(user_id) or not pid.isdigit():
+                continue
+            if _pid_alive(int(pid)):
+                online.add(user_id)
+            else:
+                self._remove(self.online_dir / name)
+        return online
+
+    def is_online(self, user_id: str) -> bool:
+        prefix = f"{self._check(user_id)}."
+        return any(
+            name.startswith(prefix) and name[len(prefix):].isdigit() and _pid_alive(int(name[len(prefix):]))
+            for name in os.listdir(self.online_dir)
+        )
+
+    def poll(self) -> tuple[set[str] | None, list[str]]:
+        """Return (online users or None if unchanged since last poll, users with changed schedules)."""
+        online = None
+        stamp = os.stat(self.online_dir).st_mtime_ns
+        if stamp != self._online_stamp or time.monotonic() - self._listed_at >= self.relist_seconds:
+            # stamp taken before listing, so a marker added meanwhile triggers another listing
+            self._online_stamp = stamp
+            self._listed_at = time.monotonic()
+            online = self._online_users()
+
+        dirty = [name for name in os.listdir(self.dirty_dir) if is_valid_user_id(name)]
+        for user_id in dirty:
+            self._remove(self.dirty_dir / user_id)
+        return online, dirty
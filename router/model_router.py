@@ -1,10 +1,9 @@
  
 from langchain_core.prompts import PromptTemplate 
 import pathlib,sys 
-from langchain_core.output_parsers import PydanticOutputParser
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
-from model.llm import llm 
+from model.llm import llm, register_reload_hook 
  
 from templates.general_health_template import COMPREHENSIVE_HEALTHCARE_AI_SYSTEM_PROMPT 
 from templates.system_template import SYSTEM_TEMPLATE 
@@ -16,22 +15,47 @@ from image_generator_schema import MedicalImagePrompt
 
 
 GENERAL_TEMPLATE = PromptTemplate.from_template(template=COMPREHENSIVE_HEALTHCARE_AI_SYSTEM_PROMPT) 
-PARSER =  PydanticOutputParser(pydantic_object=MedicalReportOutput)
-IMAGE_PARSER = PydanticOutputParser(pydantic_object=MedicalImagePrompt)
-image_fromat_instructions = IMAGE_PARSER.get_format_instructions()
-format_instructions = PARSER.get_format_instructions()
+
+
+def structured_format_instructions(schema) -> str:
+    """Short stand-in for PydanticOutputParser's instructions; the model's
+    native structured output mode enforces the schema itself."""
+    fields = ", ".join(schema.model_fields)
+    return f"A `{schema.__name__}` object with the fields: {fields}. It is returned through structured output."
+
+
+image_fromat_instructions = structured_format_instructions(MedicalImagePrompt)
+format_instructions = structured_format_instructions(MedicalReportOutput)
 
 REPORT_WRITING_TEMPLATE = PromptTemplate.from_template(template=REPORT_WRITING_SYSTEM_PROMPT).partial(format_instructions=format_instructions)
 IMAGE_GENERATOR_TEMPLATE = PromptTemplate.from_template(template=IMAGE_GENERATOR_PROMPT).partial(format_instructions=image_fromat_instructions)
 
-ROUTING_TEMPLATE = PromptTemplate(
+ROUTING_PROMPT = PromptTemplate(
     input_variables=['conversation_history', 'reference_data', 'user_input'],
     template=SYSTEM_TEMPLATE 
-) | llm()
+)
+
+CHAINS = {}
+ROUTING_TEMPLATE = None
+
+
+def build_chains() -> None:
+    """(Re)build the routing chain and route chains on the shared LLM client.
+
+    CHAINS is updated in place so modules holding a reference to it see the
+    rebuilt chains after a reload.
+    """
+    global ROUTING_TEMPLATE
+    client = llm()
+    ROUTING_TEMPLATE = ROUTING_PROMPT | client
+    CHAINS.update({
+        "GeneralHealth": GENERAL_TEMPLATE | client,
+        # these return MedicalReportOutput / MedicalImagePrompt instances,
+        # which ai.TOOL_DISPATCH hands straight to their tool
+        "WriteDocument": REPORT_WRITING_TEMPLATE | client.with_structured_output(MedicalReportOutput),
+        "GenerateMedicalImage": IMAGE_GENERATOR_TEMPLATE | client.with_structured_output(MedicalImagePrompt)
+    })
 
 
-CHAINS = {
-    "GeneralHealth": GENERAL_TEMPLATE | llm(),
-    "WriteDocument": REPORT_WRITING_TEMPLATE | llm() | PARSER,
-    "GenerateMedicalImage": IMAGE_GENERATOR_TEMPLATE | llm() | IMAGE_PARSER
-}
\ No newline at end of file
+build_chains()
+register_reload_hook(build_chains)
@@ -0,0 +1,259 @@
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import zlib
+from collections import Counter, deque
+from typing import Optional
+
+import numpy as np
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+
+
+ROUTES = ("GeneralHealth", "WriteDocument", "GenerateMedicalImage")
+ROUTE_LOG_PATH = pathlib.Path(__file__).resolve().parents[1] / "database" / "route_log.jsonl"
+
+# The explicit rules need an imperative verb paired with the thing to make.
+# A bare mention ("what does this image show", "my report says ...") only
+# marks the input as ambiguous, so the LLM decides it.
+WRITE_DOCUMENT_PATTERN = re.compile(
+    r"\b(write|create|generate|draft|prepare|produce|export)\b"
+    r".{0,40}\b(report|document|pdf|letter|referral|summary)\b",
+    re.IGNORECASE,
+)
+DOCUMENT_MENTION_PATTERN = re.compile(r"\b(report|document|pdf|letter|referral|note|notes|record)\b", re.IGNORECASE)
+IMAGE_PATTERN = re.compile(
+    r"(\b(draw|generate|create|make|produce|render|design|show me|give me)\b"
+    r".{0,40}\b(image|picture|diagram|illustration|drawing|sketch|infographic|poster|visual)s?\b)"
+    r"|(^\s*(please\s+|can you\s+|could you\s+)?(draw|sketch|illustrate|visuali[sz]e)\b)",
+    re.IGNORECASE,
+)
+IMAGE_MENTION_PATTERN = re.compile(
+    r"\b(draw\w*|illustrat\w*|diagram|image|picture|photo|visuali[sz]\w*|sketch|infographic|poster)s?\b",
+    re.IGNORECASE,
+)
+# Replies like "yes please" or "do it" only make sense with the history,
+# so the local stage never decides them.
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(yes|yeah|yep|ok|okay|sure|please|go ahead|do it|do that|continue|same|again|that one)\b",
+    re.IGNORECASE,
+)
+
+FEATURE_DIM = 2 ** 12
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> np.ndarray:
+    """Hashed, L2-normalised unigram + bigram counts."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector = np.zeros(FEATURE_DIM, dtype=np.float32)
+    for gram in grams:
+        vector[zlib.crc32(gram.encode("utf-8")) % FEATURE_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class LinearRouteModel:
+    """Softmax regression over hashed n-grams, trained on routes the LLM picked."""
+
+    def __init__(self):
+        self.weights = np.zeros((FEATURE_DIM, len(ROUTES)), dtype=np.float32)
+        self.bias = np.zeros(len(ROUTES), dtype=np.float32)
+        self.trained_on = 0
+
+    def fit(self, texts: list[str], labels: list[str], epochs: int = 200, learning_rate: float = 2.0, l2: float = 1e-4) -> None:
+        x = np.stack([_features(text) for text in texts])
+        y = np.zeros((len(labels), len(ROUTES)), dtype=np.float32)
+        y[np.arange(len(labels)), [ROUTES.index(label) for label in labels]] = 1.0
+
+        for _ in range(epochs):
+            probabilities = self._softmax(x @ self.weights + self.bias)
+            error = (probabilities - y) / len(texts)
+            self.weights -= learning_rate * (x.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        self.trained_on = len(texts)
+
+    def predict(self, text: str) -> tuple[str, float]:
+        probabilities = self._softmax((_features(text) @ self.weights + self.bias)[None, :])[0]
+        best = int(np.argmax(probabilities))
+        return ROUTES[best], float(probabilities[best])
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+class PreRouter:
+    """
+    Local routing stage that runs before the LLM router.
+
+    Keyword rules handle explicit document and image requests (verb plus
+    noun). Other messages go to a linear model trained from logged LLM
+    routes. ``route`` returns ``None`` for ambiguous input (bare document or
+    image mentions, mixed requests, bare follow-ups), while no model is
+    trained yet, and whenever the model is below ``threshold``. The caller
+    then falls back to the LLM and reports its pick through ``record`` so the
+    model keeps learning. ``stats`` counts which stage decided each route.
+
+    Training uses at most the last ``max_samples_per_route`` samples of
+    each route and runs in a background thread every ``retrain_every`` new
+    samples. Until a retrained model is ready, the previous one keeps
+    serving, so routing never waits for a fit.
+    """
+
+    def __init__(self, log_path: pathlib.Path = ROUTE_LOG_PATH, threshold: float = 0.85,
+                 min_samples: int = 30, retrain_every: int = 25, max_samples_per_route: int = 500):
+        self.log_path = pathlib.Path(log_path)
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.retrain_every = retrain_every
+        self.max_samples_per_route = max_samples_per_route
+        self._model: Optional[LinearRouteModel] = None
+        self._samples: Optional[dict[str, deque]] = None
+        self._seen = 0
+        self._trained_at = 0
+        self._training = False
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    # -------------------------------
+    # DECISION
+    # -------------------------------
+
+    def _explicit_rule(self, text: str) -> tuple[Optional[str], bool]:
+        """Return (route, ambiguous) from the keyword rules."""
+        wants_document = bool(WRITE_DOCUMENT_PATTERN.search(text))
+        wants_image = bool(IMAGE_PATTERN.search(text))
+        mentions_document = wants_document or bool(DOCUMENT_MENTION_PATTERN.search(text))
+        mentions_image = wants_image or bool(IMAGE_MENTION_PATTERN.search(text))
+        if wants_document and not mentions_image:
+            return "WriteDocument", False
+        if wants_image and not mentions_document:
+            return "GenerateMedicalImage", False
+        if mentions_document or mentions_image:
+            return None, True
+        if FOLLOW_UP_PATTERN.search(text) or len(TOKEN_PATTERN.findall(text.lower())) < 3:
+            return None, True
+        return None, False
+
+    def route(self, user_input: str) -> Optional[str]:
+        text = user_input or ""
+
+        route, ambiguous = self._explicit_rule(text)
+        if route is not None:
+            self._stats[("rules", route)] += 1
+            return route
+        if ambiguous:
+            return None
+
+        model = self._current_model()
+        if model is None:
+            return None
+        route, confidence = model.predict(text)
+        if confidence < self.threshold:
+            return None
+        self._stats[("model", route)] += 1
+        return route
+
+    # -------------------------------
+    # LEARNING
+    # -------------------------------
+
+    def _is_model_input(self, text: str) -> bool:
+        """True for the inputs ``route`` hands to the model (no rule decided them, not ambiguous)."""
+        return self._explicit_rule(text) == (None, False)
+
+    def _load_samples(self) -> dict[str, deque]:
+        """
+        Training samples from the route log.
+
+        The log only holds inputs the LLM router labelled, i.e. the ones this
+        stage deferred; rule-decided inputs are never logged. Samples the
+        model would never be asked about (explicit or ambiguous keyword
+        matches, bare follow-ups) are dropped here so training matches what
+        it sees at inference. The set is still biased: once the model is
+        active, inputs it routes confidently stop being logged, so new
+        samples over-represent the cases it was unsure about.
+        """
+        samples = {route: deque(maxlen=self.max_samples_per_route) for route in ROUTES}
+        if self.log_path.exists():
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if item.get("route") in ROUTES and self._is_model_input(item.get("text", "")):
+                        samples[item["route"]].append(item.get("text", ""))
+        return samples
+
+    def _current_model(self) -> Optional[LinearRouteModel]:
+        """The latest trained model (or None); starts a background retrain when one is due."""
+        with self._lock:
+            if self._samples is None:
+                self._samples = self._load_samples()
+                self._seen = sum(len(texts) for texts in self._samples.values())
+
+            due = self._model is None or self._seen - self._trained_at >= self.retrain_every
+            if self._training or not due:
+                return self._model
+            samples = [(text, route) for route, texts in self._samples.items() for text in texts]
+            if len(samples) < self.min_samples or len({route for _, route in samples}) < 2:
+                return self._model
+            self._training = True
+            self._trained_at = self._seen
+
+        threading.Thread(target=self._train, args=(samples,), daemon=True).start()
+        return self._model
+
+    def _train(self, samples: list[tuple[str, str]]) -> None:
+        try:
+            model = LinearRouteModel()
+            texts, labels = zip(*samples)
+            model.fit(list(texts), list(labels))
+            with self._lock:
+                self._model = model
+        finally:
+            with self._lock:
+                self._training = False
+
+    def record(self, user_input: str, route: str) -> None:
+        """Log a route chosen by the LLM router as a training sample."""
+        if route not in ROUTES:
+            return
+        self._stats[("llm", route)] += 1
+
+        line = json.dumps({"text": user_input, "route": route}) + "\n"
+        os.makedirs(self.log_path.parent, exist_ok=True)
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            if self._samples is not None and self._is_model_input(user_input):
+                self._samples[route].append(user_input)
+                self._seen += 1
+
+    # -------------------------------
+    # REPORTING
+    # -------------------------------
+
+    def stats(self) -> dict:
+        total = sum(self._stats.values())
+        decided_locally = sum(count for (stage, _), count in self._stats.items() if stage != "llm")
+        by_stage = {}
+        for (stage, route), count in self._stats.items():
+            by_stage.setdefault(stage, {})[route] = count
+        return {
+            "total": total,
+            "local_rate": decided_locally / total if total else 0.0,
+            "by_stage": by_stage,
+        }
+
+
+PRE_ROUTER = PreRouter(threshold=Config.PRE_ROUTER_THRESHOLD)
@@ -37,9 +37,7 @@ RULES (MANDATORY):
 5. Do NOT include disclaimers, explanations, or extra text.
 
 OUTPUT FORMAT:
-Return ONLY a dictionary that follows these format instructions exactly:
+Your answer is returned through structured output as:
 {format_instructions}
-
-EXAMPLE OUTPUT (FORMAT ONLY, NOT CONTENT):
-{{"image_prompt": "Medical illustration of ..."}}
+Set `image_prompt` to the prompt itself, e.g. "Medical illustration of ...".
 """
\ No newline at end of file
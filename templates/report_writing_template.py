@@ -92,9 +92,10 @@ Each generated report must include:
 
 ## OUTPUT FORMAT (MANDATORY)
 
-You must output **only** a Python dictionary in the exact schema defined by:
+Your answer is returned through structured output as:
 
 {format_instructions}
 
-No extra comments, no descriptions, and no text outside the dictionary.
+Fill in every field: `title` is the report title, `filename` a PDF file name and
+`body` the complete HTML report described above. Put nothing outside these fields.
 """
\ No newline at end of file
@@ -1,6 +1,9 @@
-from xhtml2pdf import pisa
 from pydantic.v1 import BaseModel, Field
-import os, pathlib
+import pathlib, sys
+from urllib.parse import quote
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.report_renderer import REPORT_RENDERER, ReportRenderError
 
 
 class CreateReportToolShema(BaseModel):
@@ -10,26 +13,20 @@ class CreateReportToolShema(BaseModel):
 
 
 
-def create_report_tool(filename: str,body: str) -> str:
+async def create_report_tool(filename: str,body: str) -> str:
     """
     Create a PDF file using HTML content.
     """
     try:
-        UPLOADS_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "uploads"
-        filepath = os.path.join(UPLOADS_DIR, filename)
-
         # The body parameter already contains the full HTML content
-        html_content = body
-
-        # Write HTML to PDF using xhtml2pdf
-        with open(filepath, "wb") as pdf_file:
-            pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
+        # Rendered in the report process pool; identical bodies hit the cache
+        blob_name = await REPORT_RENDERER.render_to_blob(body)
 
-        # If error then show the HTML content instead of PDF
-        if pisa_status.err:
-            return f'Error generating PDF: {pisa_status.err}'
+        # Stored under its content hash; ?name= sets the downloaded file name
+        return f"<a href='http://127.0.0.1:8001/files/download/{blob_name}?name={quote(filename)}' download>click here to download {filename}</a>"
 
-        return f"<a href='http://127.0.0.1:8001/files/download/{filename}' download>click here to download {filename}</a>"
+    except ReportRenderError as err:
+        return f'Error generating PDF: {err}'
 
     except Exception as err:
-        return f'Internal server error: {err}'
\ No newline at end of file
+        return f'Internal server error: {err}'
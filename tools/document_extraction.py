@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import xxhash
+from pypdf import PdfReader
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+
+
+PAGE_SEPARATOR = "\n\n"
+
+
+def content_hash(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """xxh3-128 of the file contents, the cache key for its extracted text."""
+    digest = xxhash.xxh3_128()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_page_range(filepath: str, start: int, stop: int) -> list[str]:
+    # runs in a pool worker, so it opens its own reader
+    reader = PdfReader(filepath)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+class DocumentExtractor:
+    """
+    Text extraction for uploaded PDFs.
+
+    Every page is extracted. Documents with at least ``parallel_min_pages``
+    pages are split into ranges of ``pages_per_task`` that run in a
+    ProcessPoolExecutor. ``iter_pages`` yields pages in order as soon as
+    each range finishes. Results are cached by content hash, in memory and
+    as JSON under ``cache_dir``. A document that was already seen, such as
+    the same lab report sent again in a follow-up, is not parsed again.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_workers: int = 4,
+                 pages_per_task: int = 8, parallel_min_pages: int = 16, memory_entries: int = 64):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+        self.parallel_min_pages = parallel_min_pages
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # -------------------------------
+    # CACHE
+    # -------------------------------
+
+    def _cache_path(self, key: str) -> pathlib.Path:
+        return self.cache_dir / f"{key}.json"
+
+    def cached_pages(self, key: str) -> Optional[list[str]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(self._cache_path(key), "r", encoding="utf-8") as f:
+                pages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self._remember(key, pages)
+        return pages
+
+    def _remember(self, key: str, pages: list[str]) -> None:
+        with self._lock:
+            self._memory[key] = pages
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, pages: list[str]) -> None:
+        self._remember(key, pages)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._cache_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, path)
+
+    # -------------------------------
+    # EXTRACTION
+    # -------------------------------
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the server process runs many threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _parse_pages(self, filepath: str) -> Iterator[str]:
+        reader = PdfReader(filepath)
+        page_count = len(reader.pages)
+
+        if page_count < self.parallel_min_pages or self.max_workers <= 1:
+            for page in reader.pages:
+                yield page.extract_text() or ""
+            return
+
+        pool = self._get_pool()
+        futures = [
+            pool.submit(_extract_page_range, filepath, start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Yield the text of each page in order, from the cache when possible."""
+        key = content_hash(filepath)
+        cached = self.cached_pages(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        pages = []
+        for text in self._parse_pages(filepath):
+            pages.append(text)
+            yield text
+        self._store(key, pages)
+
+    def extract_text(self, filepath: str) -> str:
+        return PAGE_SEPARATOR.join(self.iter_pages(filepath))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+DOCUMENT_EXTRACTOR = DocumentExtractor(
+    cache_dir=Config.DOCUMENT_CACHE_DIR,
+    max_workers=Config.DOCUMENT_WORKERS,
+)
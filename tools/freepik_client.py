@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+
+
+# generation parameters sent with every prompt (part of the image cache key)
+IMAGE_PARAMS = {"num_images": 1, "image": {"size": "square_1_1"}}
+
+
+class ImageGenerationFailed(Exception):
+    pass
+
+
+class ImageGenerationTimeout(Exception):
+    pass
+
+
+class FreepikClient:
+    """
+    Async Freepik text-to-image client over one pooled ``httpx.AsyncClient``.
+
+    Connections (and their TLS sessions) are reused across requests. Task
+    status is polled with exponentially growing intervals (``first_poll``
+    times ``backoff``, capped at ``max_poll``) and never past an overall
+    deadline. While it waits, no thread is held. ``base_url`` can point to a
+    local mock server for benchmarking.
+
+    The pooled client is tied to the event loop that created it. It is
+    rebuilt if it is used from another loop.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str], request_timeout: float = 30.0,
+                 max_connections: int = 20, first_poll: float = 0.5, backoff: float = 1.6, max_poll: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.first_poll = first_poll
+        self.backoff = backoff
+        self.max_poll = max_poll
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loop = None
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"x-freepik-api-key": self.api_key or "", "Content-Type": "application/json"},
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._loop = loop
+        return self._http
+
+    def poll_intervals(self):
+        delay = self.first_poll
+        while True:
+            yield delay
+            delay = min(delay * self.backoff, self.max_poll)
+
+    async def text_to_image(self, prompt: str, deadline_seconds: float = 60.0) -> dict:
+        """Start a generation and return the completed response payload."""
+        deadline = time.monotonic() + deadline_seconds
+        client = self._client()
+
+        response = await client.post("/v1/ai/text-to-image", json={"prompt": prompt, **IMAGE_PARAMS})
+        response.raise_for_status()
+        result = response.json()
+
+        # the classic fast endpoint returns the image directly
+        if isinstance(result.get("data"), list):
+            return result
+
+        task_id = (result.get("data") or {}).get("task_id")
+        if not task_id:
+            raise ImageGenerationFailed("no task id returned")
+
+        for delay in self.poll_intervals():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ImageGenerationTimeout(task_id)
+            await asyncio.sleep(min(delay, remaining))
+
+            status_response = await client.get(f"/v1/ai/text-to-image/hyperflux/{task_id}")
+            status_response.raise_for_status()
+            status = status_response.json()
+            task_status = (status.get("data") or {}).get("status")
+
+            if task_status == "COMPLETED":
+                return status
+            if task_status in ("FAILED", "ERROR"):
+                raise ImageGenerationFailed(task_id)
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from database.blob_store import BLOB_STORE
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Lowercase, strip punctuation and collapse whitespace, so only case and
+    spacing differences share a key. Every word is kept: "type 1" vs
+    "type 2" or "B cell" vs "T cell" are different illustrations.
+    """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", (prompt or "").lower())).strip()
+
+
+def image_variants(original: bytes, thumbnail_size: int = 384, quality: int = 80) -> dict[str, bytes]:
+    """WebP thumbnail and full-size WebP encodings of a generated image."""
+    with Image.open(io.BytesIO(original)) as image:
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        full = io.BytesIO()
+        image.save(full, format="WEBP", quality=quality, method=4)
+
+        thumb_image = image.copy()
+        thumb_image.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+        thumbnail = io.BytesIO()
+        thumb_image.save(thumbnail, format="WEBP", quality=quality, method=4)
+
+    return {"webp": full.getvalue(), "thumbnail": thumbnail.getvalue()}
+
+
+class ImageCache:
+    """
+    Generated images keyed on the normalized prompt plus generation parameters.
+
+    An entry stores the blob names of the original PNG and of its Pillow
+    variants: a WebP thumbnail for the chat bubble and a full-size WebP for
+    the link. Entries live in memory and as JSON under ``cache_dir``. The
+    blob store treats that directory as a reference source, so cached
+    images survive garbage collection. Concurrent requests for the same key
+    share one generation.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, memory_entries: int = 256):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_key(prompt: str, params: dict) -> str:
+        material = json.dumps({"prompt": normalize_prompt(prompt), "params": params}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            try:
+                with open(self.cache_dir / f"{key}.json", "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+        if any(BLOB_STORE.resolve(name) is None for name in entry.values()):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def store(self, key: str, original: bytes) -> dict:
+        """Write the original and its variants to the blob store and record the entry."""
+        entry = {"original": BLOB_STORE.put_bytes(original, ".png")}
+        for variant, data in image_variants(original).items():
+            entry[variant] = BLOB_STORE.put_bytes(data, ".webp")
+
+        self._remember(key, entry)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        return entry
+
+    async def get_or_generate(self, prompt: str, params: dict, generate: Callable[[], Awaitable[bytes]]) -> dict:
+        """Cached entry for ``prompt``; otherwise await ``generate()`` for the PNG bytes and cache them."""
+        key = self.cache_key(prompt, params)
+        entry = await asyncio.to_thread(self.lookup, key)
+        if entry is not None:
+            return entry
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            original = await generate()
+            entry = await asyncio.to_thread(self.store, key, original)
+            future.set_result(entry)
+            return entry
+        except BaseException as exc:
+            future.set_exception(exc)
+            # mark retrieved so an unawaited failure isn't logged
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+
+IMAGE_CACHE = ImageCache(Config.IMAGE_CACHE_DIR)
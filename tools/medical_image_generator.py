@@ -1,10 +1,16 @@
 import os
 import dotenv
 import pathlib
-import requests
-import time,random
 import base64
+import httpx
 from pydantic.v1 import BaseModel, Field
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from tools.freepik_client import FreepikClient, IMAGE_PARAMS, ImageGenerationFailed, ImageGenerationTimeout
+from tools.image_cache import IMAGE_CACHE
 
 
 
@@ -12,24 +18,40 @@ class IMAGEGENERATORSCHEMA(BaseModel):
     image_prompt:str
 
 
+class EmptyImageResponse(Exception):
+    pass
+
+
 dotenv.load_dotenv(dotenv_path=str(pathlib.Path(__file__).resolve().parents[1] / "utilities" / "secret" / ".env"))
 
 API_KEY = os.getenv("FREEPIK_API_KEY")
-BASE_URL = "https://api.freepik.com"
-HEADERS = {
-    "x-freepik-api-key": API_KEY,
-    "Content-Type": "application/json"
-}
+BASE_URL = Config.FREEPIK_BASE_URL
+FREEPIK_CLIENT = FreepikClient(base_url=BASE_URL, api_key=API_KEY)
+
 
+async def _generate_png(image_prompt: str, deadline_seconds: float) -> bytes:
+    # Generate the medical image (polls with backoff, no thread held)
+    response_data = await FREEPIK_CLIENT.text_to_image(image_prompt, deadline_seconds=deadline_seconds)
 
-def generate_image(image_prompt: str, max_attempts: int = 30, delay: int = 2):
+    # Extract the base64 string from the response
+    base64_string = response_data.get('data', [{}])[0].get('base64', '')
+    if not base64_string:
+        raise EmptyImageResponse()
+
+    # Decode the base64 string
+    return base64.b64decode(base64_string)
+
+
+async def generate_image(image_prompt: str, deadline_seconds: float = Config.FREEPIK_DEADLINE_SECONDS):
     """
-    Generate a medical-related image using Freepik AI, poll for completion, and save as JPG.
+    Generate a medical-related image using Freepik AI, poll for completion, and save it.
+
+    Images are cached by normalized prompt, so repeating a prompt costs no
+    API call. The chat gets a WebP thumbnail linking to the full-size WebP.
 
     Parameters:
     - image_prompt (str): The descriptive prompt for image generation.
-    - max_attempts (int): Maximum number of polling attempts (default 30).
-    - delay (int): Delay between polling attempts in seconds (default 2).
+    - deadline_seconds (float): Overall time allowed for generation and polling.
 
     Returns:
     - str: HTML img tag with the path to the saved image file, or an error message.
@@ -40,68 +62,28 @@ def generate_image(image_prompt: str, max_attempts: int = 30, delay: int = 2):
         if not API_KEY:
             return "<p style='color: red;'>Error: API key not found. Please configure your FreePik API key in the .env file.</p>"
 
-        # Generate the medical image
-        url = f"{BASE_URL}/v1/ai/text-to-image"
-        payload = {
-            "prompt": image_prompt,
-            "num_images": 1,
-            "image": {"size": "square_1_1"}
-        }
-        response = requests.post(url, headers=HEADERS, json=payload)
-        response.raise_for_status()
-        result = response.json()
-
-        # For Classic fast endpoint, image is returned directly as base64
-        if "data" in result and isinstance(result["data"], list):
-            # Image returned immediately, save it directly
-            response_data = result
-        else:
-            # For async endpoints, poll for status
-            task_id = result.get("data", {}).get("task_id")
-            if not task_id:
-                return f"<p style='color: red;'>Error: Failed to initiate image generation. Please try again later.</p>"
-
-            for _ in range(max_attempts):
-                # Poll for task status
-                status_url = f"{BASE_URL}/v1/ai/text-to-image/hyperflux/{task_id}"
-                status_response = requests.get(status_url, headers=HEADERS)
-                status_response.raise_for_status()
-                status = status_response.json()
-                task_status = status.get("data", {}).get("status")
-
-                if task_status == "COMPLETED":
-                    response_data = status
-                    break
-                elif task_status in ["FAILED", "ERROR"]:
-                    return f"<p style='color: red;'>Error: Image generation failed. Please try a different prompt.</p>"
-
-                time.sleep(delay)
-            else:
-                return f"<p style='color: red;'>Error: Image generation timed out. Please try again later.</p>"
-
-        # Extract the base64 string from the response
-        base64_string = response_data.get('data', [{}])[0].get('base64', '')
-
-        if not base64_string:
-            return f"<p style='color: red;'>Error: No image data received from the server. Please try again.</p>"
-
-        # Decode the base64 string
-        image_data = base64.b64decode(base64_string)
-        filename = f"HealthCareAI_Generated_image_{random.randint(100,600000)}.png"
-        UPLOADS_DIR = pathlib.Path(__file__).resolve().parents[1] / "database" / "uploads"
+        images = await IMAGE_CACHE.get_or_generate(
+            image_prompt,
+            IMAGE_PARAMS,
+            lambda: _generate_png(image_prompt, deadline_seconds),
+        )
 
-        # Ensure the uploads directory exists
-        UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+        return (
+            f"<a href='http://127.0.0.1:8001/uploads/{images['webp']}' target='_blank'>"
+            f"<img src='http://127.0.0.1:8001/uploads/{images['thumbnail']}' alt='image/webp' loading='lazy' />"
+            f"</a>"
+        )
 
-        filepath = os.path.join(UPLOADS_DIR, filename)
+    except EmptyImageResponse:
+        return f"<p style='color: red;'>Error: No image data received from the server. Please try again.</p>"
 
-        # Write the image data to a file
-        with open(filepath, 'wb') as image_file:
-            image_file.write(image_data)
+    except ImageGenerationFailed:
+        return f"<p style='color: red;'>Error: Image generation failed. Please try a different prompt.</p>"
 
-        return f"<img src='http://127.0.0.1:8001/uploads/{filename}' alt='image/jpg' />"
+    except ImageGenerationTimeout:
+        return f"<p style='color: red;'>Error: Image generation timed out. Please try again later.</p>"
 
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 401:
             return f"<p style='color: red;'>Error: Invalid API key. Please check your FreePik API key configuration.</p>"
         elif e.response.status_code == 403:
@@ -111,13 +93,13 @@ def generate_image(image_prompt: str, max_attempts: int = 30, delay: int = 2):
         else:
             return f"<p style='color: red;'>Error: Request failed with status code {e.response.status_code}. Please try again.</p>"
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         return f"<p style='color: red;'>Error: Unable to connect to the image generation service. Please check your internet connection.</p>"
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return f"<p style='color: red;'>Error: Request timed out. Please try again later.</p>"
 
-    except requests.exceptions.RequestException:
+    except httpx.RequestError:
         return f"<p style='color: red;'>Error: Network error occurred while generating the image. Please try again.</p>"
 
     except ValueError as e:
@@ -1,4 +1,8 @@
-from pypdf import PdfReader
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.document_extraction import DOCUMENT_EXTRACTOR
 
 
 def read_document(filepath: str) -> str:
@@ -8,9 +12,7 @@ def read_document(filepath: str) -> str:
                 lines = file.readlines()
             return ''.join(lines)  
         elif filepath.endswith(".pdf"):
-            reader = PdfReader(filepath) 
-            page = reader.pages[len(reader.pages) - 1] 
-            return page.extract_text()
+            return DOCUMENT_EXTRACTOR.extract_text(filepath)
         else:
             return "no text extracted due to invalid file type"
     except Exception as e:
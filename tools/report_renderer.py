@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import pathlib
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api"))
+from configuration.config import Config
+from database.blob_store import BLOB_STORE
+
+
+WARM_UP_HTML = (
+    "<html><body><div style='font-family: Helvetica, Arial, sans-serif;'>"
+    "<h1>HealthCareAI</h1><table><tr><td><b>warm up</b></td></tr></table>"
+    "</div></body></html>"
+)
+
+
+def _init_worker() -> None:
+    # Runs once per pool process: importing xhtml2pdf/reportlab, parsing the
+    # default stylesheet and loading the standard font metrics all happen
+    # here instead of on the first real report.
+    from xhtml2pdf import pisa
+    pisa.CreatePDF(WARM_UP_HTML, dest=io.BytesIO())
+
+
+def _render_pdf(html: str) -> tuple[int, bytes]:
+    from xhtml2pdf import pisa
+    output = io.BytesIO()
+    status = pisa.CreatePDF(html, dest=output)
+    return status.err, output.getvalue()
+
+
+class ReportRenderError(Exception):
+    pass
+
+
+class ReportRenderer:
+    """
+    Renders report HTML to PDF with xhtml2pdf in a bounded process pool.
+
+    Rendering never runs on the event loop, and at most ``max_workers``
+    reports render at once. One large report therefore cannot stall the
+    other chats. Each worker warms up xhtml2pdf once (``_init_worker``).
+    Rendered PDFs go into the blob store. A cache keyed by the SHA-256 of
+    the HTML body maps to the blob name, in memory and under ``cache_dir``,
+    so identical reports are not rendered twice.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_workers: int = 2, memory_entries: int = 256):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_workers = max_workers
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    # -------------------------------
+    # CACHE
+    # -------------------------------
+
+    @staticmethod
+    def cache_key(html: str) -> str:
+        return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+    def cached_blob(self, key: str) -> Optional[str]:
+        with self._lock:
+            blob_name = self._memory.get(key)
+        if blob_name is None:
+            try:
+                blob_name = (self.cache_dir / key).read_text(encoding="utf-8").strip()
+            except FileNotFoundError:
+                return None
+        # the blob may have been garbage collected since
+        if BLOB_STORE.resolve(blob_name) is None:
+            return None
+        self._remember(key, blob_name)
+        return blob_name
+
+    def _remember(self, key: str, blob_name: str) -> None:
+        with self._lock:
+            self._memory[key] = blob_name
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, blob_name: str) -> None:
+        self._remember(key, blob_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        tmp_path.write_text(blob_name, encoding="utf-8")
+        os.replace(tmp_path, self.cache_dir / key)
+
+    # -------------------------------
+    # RENDERING
+    # -------------------------------
+
+    async def render_to_blob(self, html: str) -> str:
+        """Render ``html`` off the event loop and return the PDF's blob name."""
+        key = self.cache_key(html)
+        blob_name = await asyncio.to_thread(self.cached_blob, key)
+        if blob_name is not None:
+            return blob_name
+
+        loop = asyncio.get_running_loop()
+        errors, pdf = await loop.run_in_executor(self._get_pool(), _render_pdf, html)
+        if errors:
+            raise ReportRenderError(f"{errors} error(s) while rendering the report")
+
+        blob_name = await asyncio.to_thread(BLOB_STORE.put_bytes, pdf, ".pdf")
+        await asyncio.to_thread(self._store, key, blob_name)
+        return blob_name
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+REPORT_RENDERER = ReportRenderer(
+    cache_dir=Config.REPORT_CACHE_DIR,
+    max_workers=Config.REPORT_WORKERS,
+)